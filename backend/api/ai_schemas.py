@@ -2,17 +2,153 @@
 AI Agronomist Data Contracts - Pydantic Models
 Structured data schemas for AI-powered field analysis and recommendations
 """
-from pydantic import BaseModel, Field, validator
-from typing import List, Dict, Optional
+from pydantic import (
+    BaseModel, ConfigDict, Field, StringConstraints, model_serializer, model_validator
+)
+from typing import Annotated, Any, List, Dict, Literal, Optional, Tuple, Union
 from datetime import datetime
 
 
+# ============================================================================
+# OpenAPI Examples - built once at import time and shared by the models
+# ============================================================================
+
+_AI_CONTEXT_EXAMPLE = {
+    "field_info": {
+        "name": "Поле Озимые-3",
+        "location": {
+            "region": "Калужская область",
+            "lat": 55.1,
+            "lon": 36.6
+        },
+        "area_ha": 150.5,
+        "crop_type": "Озимая пшеница",
+        "sowing_date": "2025-09-01"
+    },
+    "analysis_info": {
+        "date_of_scan": "2025-10-18",
+        "satellite": "Sentinel-2"
+    },
+    "weather_context": {
+        "precipitation_last_14_days_mm": 5.0,
+        "avg_temp_last_14_days_celsius": 10.5,
+        "forecast_summary": "Отсутствие осадков, риск засухи"
+    },
+    "indices_summary": {
+        "indices": {
+            "NDVI": {
+                "mean": 0.55,
+                "std_dev": 0.20,
+                "min": 0.15,
+                "max": 0.85
+            }
+        }
+    },
+    "zonation_results_VRA": {
+        "zones": [
+            {
+                "id": 1,
+                "label": "Критический стресс",
+                "area_ha": 20.0,
+                "percentage": 13.3,
+                "mean_NDVI": 0.25
+            },
+            {
+                "id": 2,
+                "label": "Слабая вегетация",
+                "area_ha": 35.0,
+                "percentage": 23.3,
+                "mean_NDVI": 0.45
+            },
+            {
+                "id": 3,
+                "label": "Умеренная вегетация",
+                "area_ha": 60.0,
+                "percentage": 40.0,
+                "mean_NDVI": 0.62
+            },
+            {
+                "id": 4,
+                "label": "Высокая вегетация",
+                "area_ha": 25.0,
+                "percentage": 16.6,
+                "mean_NDVI": 0.75
+            },
+            {
+                "id": 5,
+                "label": "Очень высокая вегетация",
+                "area_ha": 10.5,
+                "percentage": 7.0,
+                "mean_NDVI": 0.85
+            }
+        ]
+    },
+    "temporal_analysis": {
+        "mean_NDVI_change": -0.05,
+        "significant_drop_area_ha": 15.0
+    }
+}
+
+_AI_REPORT_REQUEST_EXAMPLE = {
+    "context": {
+        "field_info": {
+            "name": "Поле Озимые-3",
+            "location": {"region": "Калужская область", "lat": 55.1, "lon": 36.6},
+            "area_ha": 150.5,
+            "crop_type": "Озимая пшеница",
+            "sowing_date": "2025-09-01"
+        },
+        "analysis_info": {
+            "date_of_scan": "2025-10-18",
+            "satellite": "Sentinel-2"
+        },
+        "indices_summary": {
+            "indices": {"NDVI": {"mean": 0.55, "std_dev": 0.20}}
+        }
+    }
+}
+
+_AI_REPORT_RESPONSE_EXAMPLE = {
+    "status": "success",
+    "report_markdown": "### Отчет Виртуального Агронома\n...",
+    "generation_time_seconds": 3.2,
+    "model_used": "gemini-2.5-pro"
+}
+
+_AI_CHAT_REQUEST_EXAMPLE = {
+    "original_context": {
+        "field_info": {"name": "Поле Озимые-3", "area_ha": 150.5},
+        "indices_summary": {"indices": {"NDVI": {"mean": 0.55, "std_dev": 0.20}}}
+    },
+    "chat_history": [
+        {"role": "assistant", "content": "### Отчет Виртуального Агронома\n..."}
+    ],
+    "new_question": "Какие зоны требуют срочного внимания?"
+}
+
+_AI_CHAT_RESPONSE_EXAMPLE = {
+    "status": "success",
+    "answer": "Зоны 1 и 2 требуют срочного внимания...",
+    "generation_time_seconds": 1.5,
+    "model_used": "gemini-1.5-pro"
+}
+
+_AI_ERROR_EXAMPLE = {
+    "status": "error",
+    "error_type": "api_timeout",
+    "message": "Превышено время ожидания ответа от AI сервиса",
+    "details": "Gemini API timeout after 30 seconds"
+}
+
+
 # ============================================================================
 # Context Payload Models - Data sent to LLM for analysis
 # ============================================================================
 
 class FieldLocation(BaseModel):
     """Geographic location information"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     region: str = Field(..., description="Region or area name")
     lat: float = Field(..., ge=-90, le=90, description="Latitude")
     lon: float = Field(..., ge=-180, le=180, description="Longitude")
@@ -42,6 +178,8 @@ class WeatherContext(BaseModel):
 
 class IndexStats(BaseModel):
     """Statistics for a vegetation index"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     mean: float = Field(..., description="Mean value")
     std_dev: float = Field(..., description="Standard deviation (high = heterogeneous field)")
     min: Optional[float] = Field(None, description="Minimum value")
@@ -49,16 +187,40 @@ class IndexStats(BaseModel):
 
 
 class IndicesSummary(BaseModel):
-    """Summary of all calculated vegetation indices"""
-    NDVI: IndexStats = Field(..., description="NDVI statistics")
-    EVI: Optional[IndexStats] = Field(None, description="EVI statistics")
-    PSRI: Optional[IndexStats] = Field(None, description="PSRI statistics")
-    NBR: Optional[IndexStats] = Field(None, description="NBR statistics")
-    NDSI: Optional[IndexStats] = Field(None, description="NDSI statistics")
+    """Summary of all calculated vegetation indices, keyed by index name (NDVI is required)"""
+    indices: Dict[str, IndexStats] = Field(
+        ...,
+        description="Index statistics by index name (NDVI, EVI, PSRI, NBR, NDSI, ...)"
+    )
+    
+    @model_validator(mode="before")
+    @classmethod
+    def fold_top_level_indices(cls, data: Any) -> Any:
+        # Older clients send each index as a top-level key: {"NDVI": {...}, "EVI": {...}}
+        if isinstance(data, dict) and "indices" not in data:
+            return {"indices": {name: stats for name, stats in data.items() if stats is not None}}
+        return data
+    
+    @model_validator(mode="after")
+    def check_ndvi_present(self):
+        if "NDVI" not in self.indices:
+            raise ValueError("NDVI statistics are required")
+        return self
+    
+    @model_serializer(mode="wrap")
+    def serialize_flat(self, handler):
+        # Dump as {"NDVI": {...}, ...} so the LLM prompt keeps its flat shape
+        return handler(self)["indices"]
+    
+    @property
+    def NDVI(self) -> IndexStats:
+        return self.indices["NDVI"]
 
 
 class VRAZone(BaseModel):
     """Variable Rate Application (VRA) zone details"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     id: int = Field(..., description="Zone ID")
     label: str = Field(..., description="Zone label (e.g., 'Critical stress', 'High vegetation')")
     area_ha: float = Field(..., gt=0, description="Zone area in hectares")
@@ -68,15 +230,8 @@ class VRAZone(BaseModel):
 
 class ZonationResults(BaseModel):
     """VRA zonation results from clustering"""
-    zones: List[VRAZone] = Field(..., min_length=1, max_length=10, description="Management zones (1-10, typically 3-5)")
-    
-    @validator('zones')
-    def validate_zones(cls, v):
-        if len(v) < 1:
-            raise ValueError('Must have at least 1 zone')
-        if len(v) > 10:
-            raise ValueError('Too many zones (max 10)')
-        return v
+    # Length (1-10) is enforced by pydantic-core; no extra Python validator needed
+    zones: Annotated[List[VRAZone], Field(min_length=1, max_length=10, description="Management zones (1-10, typically 3-5)")]
 
 
 class TemporalAnalysis(BaseModel):
@@ -97,82 +252,7 @@ class AIAnalysisContext(BaseModel):
     zonation_results_VRA: Optional[ZonationResults] = Field(None, description="VRA management zones")
     temporal_analysis: Optional[TemporalAnalysis] = Field(None, description="Temporal comparison")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "field_info": {
-                    "name": "Поле Озимые-3",
-                    "location": {
-                        "region": "Калужская область",
-                        "lat": 55.1,
-                        "lon": 36.6
-                    },
-                    "area_ha": 150.5,
-                    "crop_type": "Озимая пшеница",
-                    "sowing_date": "2025-09-01"
-                },
-                "analysis_info": {
-                    "date_of_scan": "2025-10-18",
-                    "satellite": "Sentinel-2"
-                },
-                "weather_context": {
-                    "precipitation_last_14_days_mm": 5.0,
-                    "avg_temp_last_14_days_celsius": 10.5,
-                    "forecast_summary": "Отсутствие осадков, риск засухи"
-                },
-                "indices_summary": {
-                    "NDVI": {
-                        "mean": 0.55,
-                        "std_dev": 0.20,
-                        "min": 0.15,
-                        "max": 0.85
-                    }
-                },
-                "zonation_results_VRA": {
-                    "zones": [
-                        {
-                            "id": 1,
-                            "label": "Критический стресс",
-                            "area_ha": 20.0,
-                            "percentage": 13.3,
-                            "mean_NDVI": 0.25
-                        },
-                        {
-                            "id": 2,
-                            "label": "Слабая вегетация",
-                            "area_ha": 35.0,
-                            "percentage": 23.3,
-                            "mean_NDVI": 0.45
-                        },
-                        {
-                            "id": 3,
-                            "label": "Умеренная вегетация",
-                            "area_ha": 60.0,
-                            "percentage": 40.0,
-                            "mean_NDVI": 0.62
-                        },
-                        {
-                            "id": 4,
-                            "label": "Высокая вегетация",
-                            "area_ha": 25.0,
-                            "percentage": 16.6,
-                            "mean_NDVI": 0.75
-                        },
-                        {
-                            "id": 5,
-                            "label": "Очень высокая вегетация",
-                            "area_ha": 10.5,
-                            "percentage": 7.0,
-                            "mean_NDVI": 0.85
-                        }
-                    ]
-                },
-                "temporal_analysis": {
-                    "mean_NDVI_change": -0.05,
-                    "significant_drop_area_ha": 15.0
-                }
-            }
-        }
+    model_config = ConfigDict(frozen=True, json_schema_extra={"example": _AI_CONTEXT_EXAMPLE})
 
 
 # ============================================================================
@@ -183,27 +263,7 @@ class AIReportRequest(BaseModel):
     """Request for generating AI agronomist report"""
     context: AIAnalysisContext = Field(..., description="Complete field analysis context")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "context": {
-                    "field_info": {
-                        "name": "Поле Озимые-3",
-                        "location": {"region": "Калужская область", "lat": 55.1, "lon": 36.6},
-                        "area_ha": 150.5,
-                        "crop_type": "Озимая пшеница",
-                        "sowing_date": "2025-09-01"
-                    },
-                    "analysis_info": {
-                        "date_of_scan": "2025-10-18",
-                        "satellite": "Sentinel-2"
-                    },
-                    "indices_summary": {
-                        "NDVI": {"mean": 0.55, "std_dev": 0.20}
-                    }
-                }
-            }
-        }
+    model_config = ConfigDict(frozen=True, json_schema_extra={"example": _AI_REPORT_REQUEST_EXAMPLE})
 
 
 class AIReportResponse(BaseModel):
@@ -213,50 +273,82 @@ class AIReportResponse(BaseModel):
     generation_time_seconds: float = Field(..., description="Time taken to generate report")
     llm_model: str = Field(..., description="LLM model identifier", alias="model_used")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "success",
-                "report_markdown": "### Отчет Виртуального Агронома\n...",
-                "generation_time_seconds": 3.2,
-                "model_used": "gemini-2.5-pro"
-            }
-        }
-        populate_by_name = True  # Позволяет использовать и llm_model, и model_used
+    model_config = ConfigDict(frozen=True, populate_by_name=True, json_schema_extra={"example": _AI_REPORT_RESPONSE_EXAMPLE})  # Позволяет использовать и llm_model, и model_used
+
+
+# Contexts per batch report call: beyond ~8 fields one prompt gets slower than parallel calls
+AI_REPORT_BATCH_MAX_CONTEXTS = 8
+
+
+class AIReportBatchRequest(BaseModel):
+    """Request for AI reports for several fields in one LLM call (dashboard)"""
+    contexts: Annotated[
+        List[AIAnalysisContext],
+        Field(min_length=1, max_length=AI_REPORT_BATCH_MAX_CONTEXTS, description="Field analysis contexts (1-8)")
+    ]
+    
+    model_config = ConfigDict(frozen=True)
+
+
+class AIReportBatchResponse(BaseModel):
+    """AI reports in the order of the request contexts"""
+    status: str = Field(..., description="Response status")
+    reports: List[AIReportResponse] = Field(..., description="One report per context, in request order")
+    generation_time_seconds: float = Field(..., description="Total time taken to generate all reports")
+
+
+class AIReportJobResponse(BaseModel):
+    """State of an asynchronous (Gemini Batch API) report job"""
+    job_id: str = Field(..., description="Report job ID")
+    status: str = Field(..., description="pending, running, succeeded or failed")
+    poll_url: str = Field(..., description="URL to poll for the job state")
+    reports: Optional[List[AIReportResponse]] = Field(None, description="Reports in request order, once succeeded")
+    error: Optional[str] = Field(None, description="Failure reason")
+
+
+# Chat payload caps: oversized histories are rejected while parsing, before they cost
+# validation time and Gemini tokens. A message must still fit a full report, which the
+# frontend sends as the first assistant message
+AI_CHAT_MAX_HISTORY = 20
+AI_CHAT_MAX_MESSAGE_CHARS = 12000
 
 
 class ChatMessage(BaseModel):
     """Single chat message"""
-    role: str = Field(..., description="Message role: 'user' or 'assistant'")
-    content: str = Field(..., min_length=1, description="Message content")
-    timestamp: Optional[datetime] = Field(default_factory=datetime.now, description="Message timestamp")
-    
-    @validator('role')
-    def validate_role(cls, v):
-        if v not in ['user', 'assistant']:
-            raise ValueError("Role must be 'user' or 'assistant'")
-        return v
+    role: Literal['user', 'assistant'] = Field(..., description="Message role: 'user' or 'assistant'")
+    content: str = Field(..., min_length=1, max_length=AI_CHAT_MAX_MESSAGE_CHARS, description="Message content")
+    timestamp: Optional[datetime] = Field(None, description="Message timestamp (as sent by the client)")
+
+
+# Compact chat message: [role, content] pair, validated without a per-message model instance
+CompactChatMessage = Tuple[
+    Literal['user', 'assistant'],
+    Annotated[str, Field(min_length=1, max_length=AI_CHAT_MAX_MESSAGE_CHARS)]
+]
 
 
 class AIChatRequest(BaseModel):
     """Request for AI chat with RAG context"""
     original_context: AIAnalysisContext = Field(..., description="Original field analysis context")
-    chat_history: List[ChatMessage] = Field(default_factory=list, description="Previous chat messages")
-    new_question: str = Field(..., min_length=1, max_length=1000, description="New user question")
+    chat_history: Union[
+        Annotated[List[ChatMessage], Field(max_length=AI_CHAT_MAX_HISTORY)],
+        Annotated[List[CompactChatMessage], Field(max_length=AI_CHAT_MAX_HISTORY)]
+    ] = Field(
+        default_factory=list,
+        description="Previous chat messages (at most 20): message objects or compact [role, content] pairs"
+    )
+    new_question: Annotated[str, StringConstraints(strip_whitespace=True, min_length=3, max_length=1000)] = Field(
+        ..., description="New user question (3-1000 characters)"
+    )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "original_context": {
-                    "field_info": {"name": "Поле Озимые-3", "area_ha": 150.5},
-                    "indices_summary": {"NDVI": {"mean": 0.55, "std_dev": 0.20}}
-                },
-                "chat_history": [
-                    {"role": "assistant", "content": "### Отчет Виртуального Агронома\n..."}
-                ],
-                "new_question": "Какие зоны требуют срочного внимания?"
-            }
-        }
+    def history_pairs(self) -> List[Tuple[str, str]]:
+        """Chat history as (role, content) pairs, whichever form the client sent"""
+        return [
+            (msg.role, msg.content) if isinstance(msg, ChatMessage) else msg
+            for msg in self.chat_history
+        ]
+    
+    model_config = ConfigDict(frozen=True, json_schema_extra={"example": _AI_CHAT_REQUEST_EXAMPLE})
 
 
 class AIChatResponse(BaseModel):
@@ -266,16 +358,7 @@ class AIChatResponse(BaseModel):
     generation_time_seconds: float = Field(..., description="Time taken to generate answer")
     llm_model: str = Field(..., description="LLM model identifier", alias="model_used")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "success",
-                "answer": "Зоны 1 и 2 требуют срочного внимания...",
-                "generation_time_seconds": 1.5,
-                "model_used": "gemini-1.5-pro"
-            }
-        }
-        populate_by_name = True  # Позволяет использовать и llm_model, и model_used
+    model_config = ConfigDict(frozen=True, populate_by_name=True, json_schema_extra={"example": _AI_CHAT_RESPONSE_EXAMPLE})  # Позволяет использовать и llm_model, и model_used
 
 
 # ============================================================================
@@ -289,13 +372,5 @@ class AIErrorResponse(BaseModel):
     message: str = Field(..., description="Human-readable error message")
     details: Optional[str] = Field(None, description="Additional error details")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "error",
-                "error_type": "api_timeout",
-                "message": "Превышено время ожидания ответа от AI сервиса",
-                "details": "Gemini API timeout after 30 seconds"
-            }
-        }
+    model_config = ConfigDict(json_schema_extra={"example": _AI_ERROR_EXAMPLE})
 
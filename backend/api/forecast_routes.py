@@ -2,19 +2,13 @@
 API routes for ML forecasting
 Endpoints for time series forecasting of vegetation indices
 """
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
+from fastapi.concurrency import run_in_threadpool
 import logging
 
-# Import schemas and service
-try:
-    from api.forecast_schemas import ForecastRequest, ForecastResponse
-    from services.forecast_service import ForecastService, get_forecast_service
-except ImportError:
-    logging.warning("Не удалось выполнить импорты в forecast_routes. Используются заглушки.")
-    ForecastRequest = object
-    ForecastResponse = object
-    ForecastService = object
-    get_forecast_service = lambda: object()
+# Ошибка импорта здесь должна останавливать запуск, а не подменять схемы заглушками
+from api.forecast_schemas import ForecastRequest, ForecastResponse, FORECAST_RESPONSE_EXAMPLE
+from services.forecast_service import ForecastService, get_forecast_service
 
 
 logger = logging.getLogger(__name__)
@@ -22,12 +16,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post(
-    "/indices",
-    response_model=ForecastResponse,
-    status_code=status.HTTP_200_OK,
-    summary="Сгенерировать прогноз вегетационного индекса (ML)",
-    description="""
+_INDICES_DESCRIPTION = """
     Принимает исторические данные временного ряда вегетационного индекса 
     и возвращает прогноз на заданный горизонт с использованием машинного обучения.
     
@@ -38,8 +27,28 @@ router = APIRouter()
     
     **Модель:** Gradient Boosting с циклическими временными признаками для учета сезонности
     """
+
+# Готовый фрагмент OpenAPI для ответа 200: пример задается явно, а не выводится из схемы модели
+_INDICES_OPENAPI = {
+    "responses": {
+        "200": {
+            "content": {
+                "application/json": {"example": FORECAST_RESPONSE_EXAMPLE}
+            }
+        }
+    }
+}
+
+
+@router.post(
+    "/indices",
+    response_model=ForecastResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Сгенерировать прогноз вегетационного индекса (ML)",
+    description=_INDICES_DESCRIPTION,
+    openapi_extra=_INDICES_OPENAPI
 )
-def predict_index(
+async def predict_index(
     request: ForecastRequest,
     service: ForecastService = Depends(get_forecast_service)
 ):
@@ -50,13 +59,11 @@ def predict_index(
         ForecastResponse: Прогноз с историческими, интерполированными и прогнозными значениями
     """
     try:
-        # Проверка, что зависимости были импортированы корректно (если использовались заглушки)
-        if service is object() or ForecastRequest is object:
-            raise ImportError("Сервис прогнозирования или схемы запроса не были импортированы корректно.")
-             
-        response = service.generate_forecast(request)
+        # Обучение и predict — CPU-bound, выносим в пул потоков, чтобы не блокировать event loop
+        response = await run_in_threadpool(service.generate_forecast, request)
         logger.info(f"Successfully generated forecast for {request.index_name}")
-        return response
+        # Сериализация сразу в JSON средствами pydantic-core, без промежуточного dict и json.dumps
+        return Response(content=response.model_dump_json(by_alias=True), media_type="application/json")
         
     except ValueError as e:
         # Ошибки валидации данных или предобработки
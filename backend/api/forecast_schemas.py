@@ -2,75 +2,137 @@
 Pydantic schemas for ML Forecast API
 Schemas for time series forecasting of vegetation indices
 """
-from pydantic import BaseModel, Field, validator
-from typing import List, Dict, Optional
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
+from typing import List, Dict, Optional, Tuple
 from datetime import date
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
 class HistoricalDataPoint(BaseModel):
     """Отдельная точка данных из истории спутниковых наблюдений."""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     date: date
     value: float = Field(..., ge=0, le=1, description="Значение индекса (0-1)")
 
 
+class RawSeries(BaseModel):
+    """
+    Компактное представление временного ряда: параллельные массивы дат и значений.
+    Позволяет не создавать отдельную модель на каждую точку истории.
+    """
+    dates: List[date] = Field(..., description="Даты наблюдений")
+    values: List[float] = Field(..., description="Значения индекса (0-1), по одному на каждую дату")
+
+    _dates: np.ndarray = PrivateAttr()
+    _values: np.ndarray = PrivateAttr()
+
+    @model_validator(mode="after")
+    def check_arrays(self):
+        if len(self.dates) != len(self.values):
+            raise ValueError("Массивы dates и values должны иметь одинаковую длину.")
+
+        values = np.asarray(self.values, dtype=np.float64)
+        # Одна векторная проверка вместо ge/le валидаторов на каждой точке
+        if not ((values >= 0) & (values <= 1)).all():
+            raise ValueError("Значения индекса должны находиться в диапазоне 0-1.")
+
+        self._dates = np.asarray(self.dates, dtype="datetime64[D]")
+        self._values = values
+        return self
+
+
 class ForecastRequest(BaseModel):
     """Запрос на генерацию прогноза."""
     index_name: str = Field(..., description="Название индекса (например, NDVI, EVI)")
-    historical_data: List[HistoricalDataPoint]
+    historical_data: List[HistoricalDataPoint] = Field(
+        default_factory=list,
+        description="История наблюдений (список точек)"
+    )
+    raw_series: Optional[RawSeries] = Field(
+        None,
+        description="История наблюдений в виде параллельных массивов (альтернатива historical_data)"
+    )
     forecast_horizon_days: int = Field(30, ge=7, le=90, description="Горизонт прогнозирования в днях (7-90)")
 
-    @validator('historical_data')
-    def check_data_sufficiency(cls, v):
+    @model_validator(mode="after")
+    def check_historical_data(self):
+        if self.raw_series is not None and self.historical_data:
+            raise ValueError("Укажите либо historical_data, либо raw_series, но не оба сразу.")
+
+        if self.raw_series is not None:
+            count = len(self.raw_series.dates)
+        else:
+            count = len(self.historical_data)
         # Требуется минимум 10 наблюдений для стабильной интерполяции и обучения
-        if len(v) < 10:
+        if count < 10:
             raise ValueError("Недостаточно исторических данных. Требуется минимум 10 наблюдений.")
-        return v
 
-    @validator('historical_data')
-    def check_dates_are_unique(cls, v):
-        dates = [dp.date for dp in v]
-        if len(dates) != len(set(dates)):
+        if self.raw_series is not None:
+            has_duplicates = np.unique(self.raw_series._dates).size != count
+        else:
+            # Один проход с ранним выходом при первом дубликате даты
+            has_duplicates = False
+            seen_dates = set()
+            for dp in self.historical_data:
+                if dp.date in seen_dates:
+                    has_duplicates = True
+                    break
+                seen_dates.add(dp.date)
+
+        if has_duplicates:
             # Предупреждаем и обрабатываем дубликаты на этапе предобработки.
             logger.warning("Обнаружены дубликаты дат в запросе. Данные будут агрегированы (среднее).")
-        return v
+        return self
+
+    def as_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Возвращает историю как (datetime64[D], float64) массивы независимо от формата запроса."""
+        if self.raw_series is not None:
+            return self.raw_series._dates, self.raw_series._values
+        return (
+            np.array([dp.date for dp in self.historical_data], dtype="datetime64[D]"),
+            np.array([dp.value for dp in self.historical_data], dtype=np.float64)
+        )
 
 
 class ForecastDataPoint(BaseModel):
     """Точка данных в прогнозе."""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     date: date
     value: float
     # Тип данных: Historical (реальное), Interpolated (заполнение пропуска), Forecast (прогноз)
     type: str = Field(..., description="Тип данных: Historical, Interpolated, или Forecast")
 
 
+# Пример ответа для OpenAPI: используется в схеме модели и в описании эндпоинта /indices
+FORECAST_RESPONSE_EXAMPLE = {
+    "index_name": "NDVI",
+    "forecast": [
+        {
+            "date": "2025-01-01",
+            "value": 0.75,
+            "type": "Historical"
+        },
+        {
+            "date": "2025-01-15",
+            "value": 0.78,
+            "type": "Forecast"
+        }
+    ],
+    "metadata": {
+        "model_type": "HistGradientBoostingRegressor (Seasonal Features)"
+    }
+}
+
+
 class ForecastResponse(BaseModel):
     """Ответ API с результатами прогноза."""
     index_name: str
     forecast: List[ForecastDataPoint]
     metadata: Dict[str, Optional[str]] = Field(default_factory=dict)
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "index_name": "NDVI",
-                "forecast": [
-                    {
-                        "date": "2025-01-01",
-                        "value": 0.75,
-                        "type": "Historical"
-                    },
-                    {
-                        "date": "2025-01-15",
-                        "value": 0.78,
-                        "type": "Forecast"
-                    }
-                ],
-                "metadata": {
-                    "model_type": "GradientBoostingRegressor (Seasonal Features)"
-                }
-            }
-        }
-
+    model_config = ConfigDict(json_schema_extra={"example": FORECAST_RESPONSE_EXAMPLE})
@@ -1,10 +1,21 @@
 """
 API Routes for field analysis
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import hashlib
+import math
+import orjson
+import os
+import time
 import uuid
 from pathlib import Path
 import logging
@@ -19,35 +30,213 @@ from api.schemas import (
 )
 from api.ai_schemas import (
     AIReportRequest, AIReportResponse,
+    AIReportBatchRequest, AIReportBatchResponse, AIReportJobResponse,
     AIChatRequest, AIChatResponse,
     AIErrorResponse
 )
 from services.geo_processor import GeoProcessor
 from services.sentinel_service import SentinelService
 from services.zone_analyzer import zone_analyzer
-from services.ai_agronomist import ai_agronomist_service
-from database import get_db
-from database.models import User, Field, DashboardItem
+from services.ai_agronomist import ai_agronomist_service, classify_error, AI_EXECUTOR
+from services.rate_limit import ai_user_limiter, AI_USER_RATE_PER_MINUTE
+from services.results_storage import (
+    RESULTS_COLD, analysis_write_dir, find_result_path, persist_analysis, result_directories
+)
+from database import get_db, run_db
+from database.models import User, Field, DashboardItem, AnalysisRecord, AIReportJob
 from auth.utils import get_current_user
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+# orjson renders route results several times faster than the stdlib json encoder
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Initialize services
 sentinel_service = SentinelService()
 geo_processor = GeoProcessor()
 
 
+# Colormap range (vmin, vmax) for each additional index visualization
+INDEX_DISPLAY_RANGE = {
+    "EVI": (-0.2, 1.0),
+    "PSRI": (-0.2, 0.8),
+    "NBR": (-1.0, 1.0),
+    "NDSI": (-1.0, 1.0),
+}
+
+# Worker pool for CPU-bound raster processing and PNG rendering in analyze_field
+ANALYSIS_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="analysis")
+
+# Single-flight cache of Sentinel fetches for the time series: neighbouring dates request
+# overlapping windows, and concurrent awaiters of the same window share one download.
+# Cached band arrays are shared between callers and must not be modified in place.
+# Half-width of the acquisition window searched around each time series date
+TIMESERIES_WINDOW_DAYS = 15
+
+FETCH_CACHE_MAX_ENTRIES = 64
+FETCH_CACHE_TTL_SECONDS = 600
+_fetch_cache: "OrderedDict[tuple, Tuple[float, asyncio.Task]]" = OrderedDict()
+
+
+async def _cached_fetch(geometry, date_range: List[str]) -> Optional[Dict[str, np.ndarray]]:
+    """sentinel_service.fetch_data with an LRU/TTL cache keyed on (geometry, date range)"""
+    key = (orjson.dumps(geometry.model_dump(), option=orjson.OPT_SORT_KEYS), tuple(date_range))
+    now = time.monotonic()
+
+    entry = _fetch_cache.get(key)
+    if entry is not None and now - entry[0] < FETCH_CACHE_TTL_SECONDS:
+        _fetch_cache.move_to_end(key)
+        task = entry[1]
+    else:
+        task = asyncio.ensure_future(
+            sentinel_service.fetch_data(geometry=geometry, date_range=list(date_range))
+        )
+        _fetch_cache[key] = (now, task)
+        _fetch_cache.move_to_end(key)
+        while len(_fetch_cache) > FETCH_CACHE_MAX_ENTRIES:
+            _fetch_cache.popitem(last=False)
+
+    try:
+        # shield: cancelling one awaiter must not cancel the fetch shared with the others
+        return await asyncio.shield(task)
+    except Exception:
+        # Failed fetches (network errors, no scenes) are not cached
+        if _fetch_cache.get(key, (None, None))[1] is task:
+            del _fetch_cache[key]
+        raise
+
+
+# Ownership lookups: built once at import, so SQLAlchemy compiles each statement once
+# and serves repeated calls from its compiled cache
+_OWNED_FIELD_STMT = select(Field).where(
+    Field.id == bindparam("field_id"),
+    Field.user_id == bindparam("user_id")
+).limit(1)
+_OWNED_DASHBOARD_ITEM_STMT = select(DashboardItem).where(
+    DashboardItem.id == bindparam("item_id"),
+    DashboardItem.user_id == bindparam("user_id")
+).limit(1)
+
+
+# Latest analyses of a field newer than a cutoff (served by ix_analysis_records_field_id_created_at)
+_RECENT_FIELD_ANALYSES_STMT = select(AnalysisRecord).where(
+    AnalysisRecord.field_id == bindparam("field_id"),
+    AnalysisRecord.status == "completed",
+    AnalysisRecord.created_at >= bindparam("since")
+).order_by(AnalysisRecord.created_at.desc()).limit(5)
+
+# How long an NDVI raster of a field is reused for zone requests
+NDVI_REUSE_MAX_AGE = timedelta(hours=24)
+
+
+def _get_owned_field(db: Session, field_id: int, user_id: int) -> Optional[Field]:
+    """Field with the given id if it belongs to the user, else None"""
+    return db.execute(
+        _OWNED_FIELD_STMT, {"field_id": field_id, "user_id": user_id}
+    ).scalar_one_or_none()
+
+
+def _find_recent_ndvi(db: Session, field_id: int) -> Optional[Path]:
+    """ndvi.tif of the newest analysis of the field within NDVI_REUSE_MAX_AGE, if still on disk"""
+    # created_at is CURRENT_TIMESTAMP, i.e. naive UTC in SQLite
+    since = datetime.utcnow() - NDVI_REUSE_MAX_AGE
+    records = db.execute(
+        _RECENT_FIELD_ANALYSES_STMT, {"field_id": field_id, "since": since}
+    ).scalars().all()
+    for record in records:
+        ndvi_path = Path(record.path) / "ndvi.tif"
+        if ndvi_path.exists():
+            return ndvi_path
+    return None
+
+
+def _get_owned_dashboard_item(db: Session, item_id: int, user_id: int) -> Optional[DashboardItem]:
+    """Dashboard item with the given id if it belongs to the user, else None"""
+    return db.execute(
+        _OWNED_DASHBOARD_ITEM_STMT, {"item_id": item_id, "user_id": user_id}
+    ).scalar_one_or_none()
+
+
+def _add_and_commit(db: Session, obj, refresh: bool = True):
+    """
+    Save an object (new or already in the session) and, unless refresh=False, reload it:
+    server-generated columns (id, created_at) and attributes expired by the commit
+    are then read here rather than lazily on the event loop
+    """
+    db.add(obj)
+    db.commit()
+    if refresh:
+        db.refresh(obj)
+    return obj
+
+
+def _delete_and_commit(db: Session, obj) -> None:
+    db.delete(obj)
+    db.commit()
+
+
+def _process_index(
+    index_name: str,
+    sentinel_data: dict,
+    bounds: list,
+    results_dir: Path,
+    analysis_id: str,
+    valid_mask: np.ndarray
+) -> Tuple[str, Optional[dict], Optional[str]]:
+    """
+    Calculate one additional index, its statistics and visualization.
+    Runs on ANALYSIS_EXECUTOR; errors are logged and reported as (name, None, None)
+    so the remaining indices are still returned.
+    
+    Returns:
+        (index_name, stats or None, visualization URL or None)
+    """
+    try:
+        if index_name not in INDEX_DISPLAY_RANGE:
+            return index_name, None, None
+        
+        logger.info(f"Calculating {index_name}...")
+        vmin, vmax = INDEX_DISPLAY_RANGE[index_name]
+        
+        # Index, cloud mask and statistics in one fused pass (mask shared across indices)
+        index_data_masked, index_stats = geo_processor.masked_index(
+            index_name, sentinel_data, valid_mask=valid_mask
+        )
+        
+        # Generate visualization
+        index_filename = geo_processor.generate_visualization(
+            data_array=index_data_masked,
+            bounds=bounds,
+            output_dir=results_dir,
+            filename=f"{index_name.lower()}_visualization.png",
+            index_name=index_name,
+            vmin=vmin,
+            vmax=vmax
+        )
+        logger.info(f"{index_name} visualization generated")
+        return index_name, index_stats, f"/results/{analysis_id}/{index_filename}"
+        
+    except Exception as e:
+        logger.error(f"Failed to calculate {index_name}: {e}")
+        # Continue with other indices
+        return index_name, None, None
+
+
 @router.post("/analyze", response_model=AnalysisResponse)
-async def analyze_field(request: AnalysisRequest):
+async def analyze_field(
+    request: AnalysisRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
     """
     Analyze agricultural field using Sentinel-2 data
     
     Args:
         request: Analysis request containing geometry, date range, and indices to calculate
+        background_tasks: Used to persist hot-storage results after the response
+        db: Database session
         
     Returns:
         Analysis results with NDVI statistics and visualizations for all requested indices
@@ -58,8 +247,7 @@ async def analyze_field(request: AnalysisRequest):
         
         # Generate unique ID for this analysis
         analysis_id = str(uuid.uuid4())
-        results_dir = Path("results") / analysis_id
-        results_dir.mkdir(parents=True, exist_ok=True)
+        results_dir = analysis_write_dir(analysis_id)
         
         # Step 1: Fetch Sentinel-2 data
         logger.info("Fetching Sentinel-2 data...")
@@ -75,100 +263,83 @@ async def analyze_field(request: AnalysisRequest):
             )
         
         # Step 2: Process NDVI (always calculated)
+        # CPU-bound raster work runs on ANALYSIS_EXECUTOR so the event loop stays responsive
         logger.info("Processing data and calculating NDVI...")
-        analysis_result = geo_processor.process_field(
-            red_band=sentinel_data["red"],
-            nir_band=sentinel_data["nir"],
-            scl_band=sentinel_data["scl"],
-            geometry=request.geometry,
-            output_dir=results_dir
+        loop = asyncio.get_running_loop()
+        # Cloud mask is built once per scene and shared by NDVI and every additional index
+        valid_mask = await loop.run_in_executor(
+            ANALYSIS_EXECUTOR,
+            geo_processor.valid_pixel_mask,
+            sentinel_data["scl"],
+            sentinel_data["red"].shape
         )
         
-        # Step 3: Generate NDVI visualization
+        # Fully clouded scene: every index, statistic and image would be empty, so skip them
+        valid_pixel_count = np.count_nonzero(valid_mask)
+        logger.info(f"Cloud fraction: {100 * (1 - valid_pixel_count / valid_mask.size):.1f}%")
+        if valid_pixel_count == 0:
+            logger.warning("No valid (cloud-free) pixels in the scene, skipping index calculation")
+            return AnalysisResponse(
+                status="no_valid_data",
+                image_url="",
+                bounds=geo_processor.field_bounds(request.geometry),
+                stats=geo_processor.no_valid_data_stats(
+                    request.geometry, datetime.now().strftime("%Y-%m-%d")
+                )
+            )
+        
+        await asyncio.to_thread(results_dir.mkdir, parents=True, exist_ok=True)
+        analysis_result = await loop.run_in_executor(
+            ANALYSIS_EXECUTOR,
+            partial(
+                geo_processor.process_field,
+                red_band=sentinel_data["red"],
+                nir_band=sentinel_data["nir"],
+                scl_band=sentinel_data["scl"],
+                geometry=request.geometry,
+                output_dir=results_dir,
+                valid_mask=valid_mask
+            )
+        )
+        
+        # Step 3 + 4: NDVI visualization and additional indices, rendered concurrently
         logger.info("Generating NDVI visualization...")
-        ndvi_filename = geo_processor.generate_visualization(
-            data_array=analysis_result["ndvi"],
-            bounds=analysis_result["bounds"],
-            output_dir=results_dir,
-            filename="ndvi_visualization.png",
-            index_name="NDVI",
-            vmin=-0.2,
-            vmax=1.0
+        ndvi_task = loop.run_in_executor(
+            ANALYSIS_EXECUTOR,
+            partial(
+                geo_processor.generate_visualization,
+                data_array=analysis_result["ndvi"],
+                bounds=analysis_result["bounds"],
+                output_dir=results_dir,
+                filename="ndvi_visualization.png",
+                index_name="NDVI",
+                vmin=-0.2,
+                vmax=1.0
+            )
         )
+        index_tasks = [
+            loop.run_in_executor(
+                ANALYSIS_EXECUTOR,
+                _process_index,
+                index_name,
+                sentinel_data,
+                analysis_result["bounds"],
+                results_dir,
+                analysis_id,
+                valid_mask
+            )
+            for index_name in request.indices
+            if index_name != "NDVI"  # Already processed
+        ]
+        ndvi_filename, *index_results = await asyncio.gather(ndvi_task, *index_tasks)
         
-        # Step 4: Calculate and visualize additional indices
         additional_indices_urls = {}
         indices_stats = {}
-        
-        for index_name in request.indices:
-            if index_name == "NDVI":
-                continue  # Already processed
-            
-            try:
-                logger.info(f"Calculating {index_name}...")
-                index_data = None
-                vmin, vmax = -1.0, 1.0  # Default range
-                
-                if index_name == "EVI":
-                    index_data = geo_processor.calculate_evi(
-                        red=sentinel_data["red"],
-                        nir=sentinel_data["nir"],
-                        blue=sentinel_data["blue"]
-                    )
-                    vmin, vmax = -0.2, 1.0
-                    
-                elif index_name == "PSRI":
-                    index_data = geo_processor.calculate_psri(
-                        red=sentinel_data["red"],
-                        green=sentinel_data["green"],
-                        nir=sentinel_data["nir"]
-                    )
-                    vmin, vmax = -0.2, 0.8
-                    
-                elif index_name == "NBR":
-                    index_data = geo_processor.calculate_nbr(
-                        nir=sentinel_data["nir"],
-                        swir2=sentinel_data["swir2"]
-                    )
-                    vmin, vmax = -1.0, 1.0
-                    
-                elif index_name == "NDSI":
-                    index_data = geo_processor.calculate_ndsi(
-                        green=sentinel_data["green"],
-                        swir1=sentinel_data["swir1"]
-                    )
-                    vmin, vmax = -1.0, 1.0
-                
-                if index_data is not None:
-                    # Apply cloud mask
-                    index_data_masked = geo_processor.apply_cloud_mask(index_data, sentinel_data["scl"])
-                    
-                    # Calculate statistics
-                    valid_data = index_data_masked[~np.isnan(index_data_masked)]
-                    if valid_data.size > 0:
-                        indices_stats[index_name] = {
-                            "mean": float(np.mean(valid_data)),
-                            "min": float(np.min(valid_data)),
-                            "max": float(np.max(valid_data)),
-                            "std_dev": float(np.std(valid_data))
-                        }
-                    
-                    # Generate visualization
-                    index_filename = geo_processor.generate_visualization(
-                        data_array=index_data_masked,
-                        bounds=analysis_result["bounds"],
-                        output_dir=results_dir,
-                        filename=f"{index_name.lower()}_visualization.png",
-                        index_name=index_name,
-                        vmin=vmin,
-                        vmax=vmax
-                    )
-                    additional_indices_urls[index_name] = f"/results/{analysis_id}/{index_filename}"
-                    logger.info(f"{index_name} visualization generated")
-                    
-            except Exception as e:
-                logger.error(f"Failed to calculate {index_name}: {e}")
-                # Continue with other indices
+        for index_name, index_stats, index_url in index_results:
+            if index_stats is not None:
+                indices_stats[index_name] = index_stats
+            if index_url is not None:
+                additional_indices_urls[index_name] = index_url
         
         # Update stats with additional indices
         if indices_stats:
@@ -183,6 +354,16 @@ async def analyze_field(request: AnalysisRequest):
             additional_indices=additional_indices_urls if additional_indices_urls else None
         )
         
+        # Register the analysis so /status answers from the DB instead of the filesystem
+        await run_db(
+            partial(_add_and_commit, refresh=False),
+            db, AnalysisRecord(id=analysis_id, status="completed", path=str(RESULTS_COLD / analysis_id))
+        )
+        # Artifacts written to hot storage (RESULTS_HOT) are copied to durable storage
+        # after the response has been sent
+        if results_dir.parent != RESULTS_COLD:
+            background_tasks.add_task(persist_analysis, analysis_id)
+        
         logger.info(f"Analysis completed successfully. Mean NDVI: {response.stats.mean_ndvi:.3f}")
         if indices_stats:
             logger.info(f"Additional indices calculated: {list(indices_stats.keys())}")
@@ -199,25 +380,26 @@ async def analyze_field(request: AnalysisRequest):
 
 
 @router.get("/status/{analysis_id}")
-async def get_analysis_status(analysis_id: str):
+async def get_analysis_status(analysis_id: str, db: Session = Depends(get_db)):
     """
     Get status of a specific analysis
     
     Args:
         analysis_id: UUID of the analysis
+        db: Database session
         
     Returns:
         Status information
     """
-    results_dir = Path("results") / analysis_id
+    record = await run_db(db.get, AnalysisRecord, analysis_id)
     
-    if not results_dir.exists():
+    if record is None:
         raise HTTPException(status_code=404, detail="Analysis not found")
     
     return {
-        "analysis_id": analysis_id,
-        "status": "completed",
-        "timestamp": datetime.now().isoformat()
+        "analysis_id": record.id,
+        "status": record.status,
+        "timestamp": record.created_at.isoformat() if record.created_at else None
     }
 
 
@@ -269,28 +451,31 @@ async def analyze_timeseries(request: TimeSeriesRequest):
         
         logger.info(f"Using interval of {interval} days for {days_diff} days range")
         
-        # Iterate through dates
-        current_date = start_date
-        point_count = 0
-        while current_date <= end_date and point_count < max_points:
-            date_str = current_date.strftime('%Y-%m-%d')
-            
-            # Get index value for this date
-            index_value = await get_field_index_for_date(
-                request.geometry,
-                current_date,
-                request.index_type
-            )
-            
+        # Pre-compute the whole schedule (end date inclusive) and fetch all dates concurrently;
+        # interval >= days_diff // max_points keeps it to about max_points dates
+        schedule = np.arange(
+            np.datetime64(start_date.date()),
+            np.datetime64(end_date.date()) + np.timedelta64(1, 'D'),
+            np.timedelta64(interval, 'D')
+        )
+        sample_dates = schedule.astype('datetime64[s]').tolist()  # -> datetime objects
+        
+        index_values = await asyncio.gather(*[
+            get_field_index_for_date(request.geometry, sample_date, request.index_type)
+            for sample_date in sample_dates
+        ])
+        
+        # Dates without valid data are skipped, so the cap applies to valid points only
+        for sample_date, index_value in zip(sample_dates, index_values):
+            if len(dates) >= max_points:
+                break
+            date_str = sample_date.strftime('%Y-%m-%d')
             if index_value is not None and not np.isnan(index_value):
                 dates.append(date_str)
                 values.append(float(index_value))
                 logger.info(f"Date {date_str}: {request.index_type}={index_value:.3f}")
-                point_count += 1
             else:
                 logger.warning(f"No valid data for {date_str}")
-            
-            current_date += timedelta(days=interval)
         
         if not dates:
             raise HTTPException(
@@ -337,72 +522,31 @@ async def get_field_index_for_date(
         # Format date for API request
         date_str = date.strftime('%Y-%m-%d')
         
-        # Try with ±7 days window first (wider window for better data availability)
-        date_start = (date - timedelta(days=7)).strftime('%Y-%m-%d')
-        date_end = (date + timedelta(days=7)).strftime('%Y-%m-%d')
+        if index_type not in ("NDVI", *INDEX_DISPLAY_RANGE):
+            return None
         
-        logger.info(f"Fetching Sentinel-2 data for {date_str}, window: {date_start} to {date_end}")
+        # Single ±15 days window: Sentinel Hub mosaics it in leastCC order, so the least
+        # cloudy acquisition around the date is used without a second, wider request
+        date_start = (date - timedelta(days=TIMESERIES_WINDOW_DAYS)).strftime('%Y-%m-%d')
+        date_end = (date + timedelta(days=TIMESERIES_WINDOW_DAYS)).strftime('%Y-%m-%d')
         
-        sentinel_data = await sentinel_service.fetch_data(
-            geometry=geometry,
-            date_range=[date_start, date_end]
-        )
+        logger.info(f"Fetching Sentinel-2 data for {date_str}, window: {date_start} to {date_end}")
         
-        # If no data found, try even wider window (±15 days)
-        if not sentinel_data:
-            logger.warning(f"No data found for {date_str} with ±7 days window, trying ±15 days")
-            date_start = (date - timedelta(days=15)).strftime('%Y-%m-%d')
-            date_end = (date + timedelta(days=15)).strftime('%Y-%m-%d')
-            
-            sentinel_data = await sentinel_service.fetch_data(
-                geometry=geometry,
-                date_range=[date_start, date_end]
-            )
+        sentinel_data = await _cached_fetch(geometry, [date_start, date_end])
         
         if not sentinel_data:
-            logger.warning(f"No Sentinel-2 data available for {date_str} even with ±15 days window")
+            logger.warning(f"No Sentinel-2 data available for {date_str} with ±{TIMESERIES_WINDOW_DAYS} days window")
             return None
         
-        # Calculate the requested index
-        if index_type == "NDVI":
-            # NDVI calculation
-            index_data = geo_processor.calculate_ndvi(
-                red=sentinel_data["red"],
-                nir=sentinel_data["nir"]
-            )
-        elif index_type == "EVI":
-            index_data = geo_processor.calculate_evi(
-                red=sentinel_data["red"],
-                nir=sentinel_data["nir"],
-                blue=sentinel_data["blue"]
-            )
-        elif index_type == "PSRI":
-            index_data = geo_processor.calculate_psri(
-                red=sentinel_data["red"],
-                green=sentinel_data["green"],
-                nir=sentinel_data["nir"]
-            )
-        elif index_type == "NBR":
-            index_data = geo_processor.calculate_nbr(
-                nir=sentinel_data["nir"],
-                swir2=sentinel_data["swir2"]
-            )
-        elif index_type == "NDSI":
-            index_data = geo_processor.calculate_ndsi(
-                green=sentinel_data["green"],
-                swir1=sentinel_data["swir1"]
-            )
-        else:
-            return None
-        
-        # Apply cloud mask
-        index_data_masked = geo_processor.apply_cloud_mask(index_data, sentinel_data["scl"])
-        
-        # Calculate mean value
-        valid_data = index_data_masked[~np.isnan(index_data_masked)]
+        # Calculate the requested index with cloud mask and mean in one fused pass,
+        # off the event loop so the other dates of the time series keep progressing
+        _, index_stats = await asyncio.get_running_loop().run_in_executor(
+            ANALYSIS_EXECUTOR,
+            partial(geo_processor.masked_index, index_type, sentinel_data, sentinel_data["scl"])
+        )
         
-        if valid_data.size > 0:
-            return np.mean(valid_data)
+        if index_stats is not None:
+            return index_stats["mean"]
         else:
             return None
             
@@ -442,9 +586,7 @@ async def create_field(
             geometry_geojson=field_data.geometry.dict()
         )
         
-        db.add(new_field)
-        db.commit()
-        db.refresh(new_field)
+        await run_db(_add_and_commit, db, new_field)
         
         logger.info(f"Field created successfully: ID={new_field.id}")
         
@@ -480,7 +622,9 @@ async def get_user_fields(
     try:
         logger.info(f"Fetching fields for user {current_user.id}")
         
-        fields = db.query(Field).filter(Field.user_id == current_user.id).order_by(Field.created_at.desc()).all()
+        fields = await run_db(
+            db.query(Field).filter(Field.user_id == current_user.id).order_by(Field.created_at.desc()).all
+        )
         
         logger.info(f"Found {len(fields)} fields for user {current_user.id}")
         
@@ -525,10 +669,7 @@ async def create_dashboard_item(
         logger.info(f"Creating dashboard item for user {current_user.id}")
         
         # Verify that the field belongs to the current user
-        field = db.query(Field).filter(
-            Field.id == item_data.field_id,
-            Field.user_id == current_user.id
-        ).first()
+        field = await run_db(_get_owned_field, db, item_data.field_id, current_user.id)
         
         if not field:
             raise HTTPException(
@@ -546,9 +687,7 @@ async def create_dashboard_item(
             index_type=item_data.index_type
         )
         
-        db.add(new_item)
-        db.commit()
-        db.refresh(new_item)
+        await run_db(_add_and_commit, db, new_item)
         
         logger.info(f"Dashboard item created successfully: ID={new_item.id}")
         
@@ -592,33 +731,38 @@ async def get_dashboard_items(
     try:
         logger.info(f"Fetching dashboard items for user {current_user.id}")
         
-        # Query dashboard items with joined field data
-        items = db.query(DashboardItem).filter(
+        # Query dashboard items, then their fields in one IN query (2 round trips in total).
+        # Each field row is loaded once even when several items share it, instead of
+        # repeating its geometry JSON on every joined item row
+        items = await run_db(db.query(DashboardItem).options(
+            selectinload(DashboardItem.field)
+        ).filter(
             DashboardItem.user_id == current_user.id
-        ).order_by(DashboardItem.display_order, DashboardItem.created_at.desc()).all()
+        ).order_by(DashboardItem.display_order, DashboardItem.created_at.desc()).all)
         
         logger.info(f"Found {len(items)} dashboard items for user {current_user.id}")
         
         # Build response with field data
         response_items = []
         for item in items:
-            field = db.query(Field).filter(Field.id == item.field_id).first()
-            if field:
-                response_items.append(
-                    DashboardItemResponse(
-                        id=item.id,
-                        user_id=item.user_id,
-                        field_id=item.field_id,
-                        field_name=field.name,
-                        field_geometry=field.geometry_geojson,
-                        item_type=item.item_type,
-                        start_date=item.start_date,
-                        end_date=item.end_date,
-                        index_type=item.index_type,
-                        display_order=item.display_order,
-                        created_at=item.created_at
-                    )
+            if item.field is None:
+                # Field no longer exists
+                continue
+            response_items.append(
+                DashboardItemResponse(
+                    id=item.id,
+                    user_id=item.user_id,
+                    field_id=item.field_id,
+                    field_name=item.field.name,
+                    field_geometry=item.field.geometry_geojson,
+                    item_type=item.item_type,
+                    start_date=item.start_date,
+                    end_date=item.end_date,
+                    index_type=item.index_type,
+                    display_order=item.display_order,
+                    created_at=item.created_at
                 )
+            )
         
         return response_items
         
@@ -645,10 +789,7 @@ async def delete_dashboard_item(
         logger.info(f"Deleting dashboard item {item_id} for user {current_user.id}")
         
         # Find the item and verify ownership
-        item = db.query(DashboardItem).filter(
-            DashboardItem.id == item_id,
-            DashboardItem.user_id == current_user.id
-        ).first()
+        item = await run_db(_get_owned_dashboard_item, db, item_id, current_user.id)
         
         if not item:
             raise HTTPException(
@@ -656,8 +797,7 @@ async def delete_dashboard_item(
                 detail="Dashboard item not found or does not belong to the current user"
             )
         
-        db.delete(item)
-        db.commit()
+        await run_db(_delete_and_commit, db, item)
         
         logger.info(f"Dashboard item {item_id} deleted successfully")
         
@@ -702,8 +842,8 @@ async def create_management_zones(
             logger.info(f"Using provided NDVI data: {ndvi_path}")
         elif request.analysis_id:
             # Try to find NDVI file from previous analysis
-            ndvi_path = Path("results") / request.analysis_id / "ndvi.tif"
-            if not ndvi_path.exists():
+            ndvi_path = await asyncio.to_thread(find_result_path, f"{request.analysis_id}/ndvi.tif")
+            if ndvi_path is None:
                 raise HTTPException(
                     status_code=404,
                     detail=f"NDVI data not found for analysis_id: {request.analysis_id}"
@@ -711,10 +851,7 @@ async def create_management_zones(
             logger.info(f"Using NDVI from analysis {request.analysis_id}")
         elif request.field_id:
             # Need to run analysis first for this field
-            field = db.query(Field).filter(
-                Field.id == request.field_id,
-                Field.user_id == current_user.id
-            ).first()
+            field = await run_db(_get_owned_field, db, request.field_id, current_user.id)
             
             if not field:
                 raise HTTPException(
@@ -722,55 +859,76 @@ async def create_management_zones(
                     detail="Field not found or does not belong to the current user"
                 )
             
-            # Create a temporary analysis to get NDVI data
-            logger.info(f"Running NDVI analysis for field {request.field_id}")
-            analysis_id = str(uuid.uuid4())
-            results_dir = Path("results") / analysis_id
-            results_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Fetch and process data
-            from datetime import date
-            sentinel_data = await sentinel_service.fetch_data(
-                geometry=field.geometry_geojson,
-                date_range=[
-                    (date.today() - timedelta(days=30)).isoformat(),
-                    date.today().isoformat()
-                ]
-            )
+            # Reuse a recent NDVI of this field instead of fetching and processing again
+            ndvi_path = await run_db(_find_recent_ndvi, db, field.id)
+            if ndvi_path is not None:
+                logger.info(f"Reusing NDVI for field {request.field_id}: {ndvi_path}")
+            else:
+                # Create a temporary analysis to get NDVI data
+                logger.info(f"Running NDVI analysis for field {request.field_id}")
+                analysis_id = str(uuid.uuid4())
+                results_dir = RESULTS_COLD / analysis_id
+                await asyncio.to_thread(results_dir.mkdir, parents=True, exist_ok=True)
             
-            if not sentinel_data:
-                raise HTTPException(
-                    status_code=404,
-                    detail="No suitable Sentinel-2 imagery found for this field"
+                # Fetch and process data
+                from datetime import date
+                sentinel_data = await sentinel_service.fetch_data(
+                    geometry=field.geometry_geojson,
+                    date_range=[
+                        (date.today() - timedelta(days=30)).isoformat(),
+                        date.today().isoformat()
+                    ]
                 )
             
-            analysis_result = geo_processor.process_field(
-                red_band=sentinel_data["red"],
-                nir_band=sentinel_data["nir"],
-                scl_band=sentinel_data["scl"],
-                geometry=field.geometry_geojson,
-                output_dir=results_dir
-            )
+                if not sentinel_data:
+                    raise HTTPException(
+                        status_code=404,
+                        detail="No suitable Sentinel-2 imagery found for this field"
+                    )
+            
+                analysis_result = await asyncio.get_running_loop().run_in_executor(
+                    ANALYSIS_EXECUTOR,
+                    partial(
+                        geo_processor.process_field,
+                        red_band=sentinel_data["red"],
+                        nir_band=sentinel_data["nir"],
+                        scl_band=sentinel_data["scl"],
+                        geometry=field.geometry_geojson,
+                        output_dir=results_dir
+                    )
+                )
             
-            ndvi_path = results_dir / "ndvi.tif"
+                ndvi_path = results_dir / "ndvi.tif"
+                # Recorded so that later zone requests for this field can reuse the NDVI
+                await run_db(partial(_add_and_commit, refresh=False), db, AnalysisRecord(
+                    id=analysis_id,
+                    user_id=current_user.id,
+                    field_id=field.id,
+                    status="completed",
+                    path=str(results_dir)
+                ))
         else:
             raise HTTPException(
                 status_code=400,
                 detail="Must provide either field_id, analysis_id, or ndvi_data_url"
             )
         
-        if not ndvi_path or not Path(ndvi_path).exists():
+        if not ndvi_path or not await asyncio.to_thread(Path(ndvi_path).exists):
             raise HTTPException(
                 status_code=404,
                 detail="NDVI data file not found"
             )
         
-        # Create management zones
+        # Create management zones (K-means + vectorization + file export, off the event loop)
         logger.info(f"Creating {request.num_zones} management zones...")
-        zone_result = zone_analyzer.create_management_zones(
-            ndvi_path=str(ndvi_path),
-            num_zones=request.num_zones,
-            analysis_id=request.analysis_id
+        zone_result = await asyncio.get_running_loop().run_in_executor(
+            ANALYSIS_EXECUTOR,
+            partial(
+                zone_analyzer.create_management_zones,
+                ndvi_path=str(ndvi_path),
+                num_zones=request.num_zones,
+                analysis_id=request.analysis_id
+            )
         )
         
         logger.info(f"Zone analysis completed successfully: {zone_result['num_zones']} zones created")
@@ -791,16 +949,38 @@ async def create_management_zones(
 from fastapi.responses import FileResponse
 import os
 
+# Zone artifacts are immutable per UUID, so clients may cache them indefinitely.
+# private: downloads require authentication, so shared caches (CDN, proxies) must not store them
+DOWNLOAD_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def _file_etag(stat_result: os.stat_result) -> str:
+    """Strong ETag from inode, modification time and size"""
+    return f'"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, list of tags or "*")"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
 @router.get("/downloads/{file_id}")
 async def download_file(
     file_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """
     Download generated zone files (GeoJSON or Shapefile ZIP)
     
+    Supports conditional GET: a matching If-None-Match returns 304 without a body.
+    
     Args:
         file_id: File identifier (e.g., zones_uuid.geojson or zones_uuid.zip)
+        request: HTTP request (for If-None-Match)
         current_user: Authenticated user
         
     Returns:
@@ -809,15 +989,28 @@ async def download_file(
     try:
         logger.info(f"Download request for file: {file_id}")
         
-        # Construct file path
-        file_path = Path("results") / file_id
-        
-        # Security check: ensure file exists and is within results directory
-        if not file_path.exists():
+        # Look the file up in hot storage first, then in the durable results directory
+        for results_root in result_directories():
+            results_root = results_root.resolve()
+            file_path = (results_root / file_id).resolve()
+            
+            # Security check: ensure file is within results directory
+            if not file_path.is_relative_to(results_root):
+                raise HTTPException(status_code=403, detail="Access denied")
+            
+            # Ensure file exists (the stat also provides the ETag)
+            try:
+                stat_result = await asyncio.to_thread(os.stat, file_path)
+                break
+            except FileNotFoundError:
+                continue
+        else:
             raise HTTPException(status_code=404, detail="File not found")
         
-        if not file_path.is_relative_to(Path("results").resolve()):
-            raise HTTPException(status_code=403, detail="Access denied")
+        etag = _file_etag(stat_result)
+        cache_headers = {"ETag": etag, "Cache-Control": DOWNLOAD_CACHE_CONTROL}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=cache_headers)
         
         # Determine media type
         media_type = "application/octet-stream"
@@ -828,10 +1021,13 @@ async def download_file(
         
         logger.info(f"Serving file: {file_path}")
         
+        # stat_result is passed on so FileResponse does not stat the file again
         return FileResponse(
             path=str(file_path),
             media_type=media_type,
-            filename=file_id
+            filename=file_id,
+            headers=cache_headers,
+            stat_result=stat_result
         )
         
     except HTTPException:
@@ -845,10 +1041,97 @@ async def download_file(
 # AI Agronomist Endpoints
 # ============================================================================
 
+async def get_ai_rate_limited_user(current_user: User = Depends(get_current_user)) -> User:
+    """
+    get_current_user for the interactive Gemini endpoints, with a per-user token bucket
+    (AI_USER_RATE_PER_MINUTE requests per minute, bursts up to the same number)
+
+    Raises:
+        HTTPException 429 with Retry-After once the user's bucket is empty
+    """
+    retry_after = ai_user_limiter.try_acquire(current_user.id)
+    if retry_after > 0:
+        logger.warning("AI rate limit exceeded by user %s", current_user.id)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many AI requests: the limit is {AI_USER_RATE_PER_MINUTE} per minute. Please retry later.",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+    return current_user
+
+
+# Reports for identical contexts (repeat clicks, dashboard refreshes) are served from
+# memory; concurrent requests for the same context share one generation
+REPORT_CACHE_MAX_ENTRIES = 256
+REPORT_CACHE_TTL_SECONDS = 300
+_report_cache: "OrderedDict[str, Tuple[float, asyncio.Task]]" = OrderedDict()
+
+
+async def _cached_report(request: AIReportRequest) -> Tuple[AIReportResponse, bool]:
+    """
+    ai_agronomist_service.generate_report with a single-flight LRU/TTL cache
+    keyed on the sha256 of the context JSON
+
+    Returns:
+        (report, True if served from the cache or an in-flight generation)
+    """
+    key = hashlib.sha256(request.context.model_dump_json().encode("utf-8")).hexdigest()
+    now = time.monotonic()
+
+    entry = _report_cache.get(key)
+    hit = entry is not None and now - entry[0] < REPORT_CACHE_TTL_SECONDS
+    if hit:
+        _report_cache.move_to_end(key)
+        task = entry[1]
+    else:
+        task = asyncio.ensure_future(ai_agronomist_service.generate_report(context=request.context))
+        _report_cache[key] = (now, task)
+        _report_cache.move_to_end(key)
+        while len(_report_cache) > REPORT_CACHE_MAX_ENTRIES:
+            _report_cache.popitem(last=False)
+
+    try:
+        # shield: a client disconnect must not cancel a generation shared with others
+        return await asyncio.shield(task), hit
+    except Exception:
+        # Failed generations (timeouts, quota) are not cached
+        if _report_cache.get(key, (None, None))[1] is task:
+            del _report_cache[key]
+        raise
+
+
+# Chat answers depend on the conversation, so they are not cached; identical turns that
+# are in flight at the same time (double submits, retries) share one Gemini call
+_chat_in_flight: Dict[str, asyncio.Task] = {}
+
+
+async def _coalesced_chat(request: AIChatRequest) -> AIChatResponse:
+    """ai_agronomist_service.chat, coalescing concurrent identical requests"""
+    history = request.history_pairs()
+    key = hashlib.sha256(orjson.dumps(
+        [request.original_context.model_dump_json(), history, request.new_question]
+    )).hexdigest()
+
+    task = _chat_in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(ai_agronomist_service.chat(
+            original_context=request.original_context,
+            chat_history=history,
+            new_question=request.new_question
+        ))
+        _chat_in_flight[key] = task
+        task.add_done_callback(lambda _: _chat_in_flight.pop(key, None))
+    else:
+        logger.info("Joining an in-flight identical chat request")
+
+    # shield: a client disconnect must not cancel a call shared with others
+    return await asyncio.shield(task)
+
+
 @router.post("/analysis/ai_report", response_model=AIReportResponse)
 async def generate_ai_report(
     request: AIReportRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_ai_rate_limited_user)
 ):
     """
     Generate AI-powered agronomist report based on field analysis context
@@ -867,9 +1150,11 @@ async def generate_ai_report(
         AIReportResponse with generated Markdown report
     """
     try:
-        logger.info(f"✅ AI report request received from user {current_user.id}")
-        logger.info(f"Field: {request.context.field_info.name}, Area: {request.context.field_info.area_ha} ha")
-        logger.info(f"NDVI stats: mean={request.context.indices_summary.NDVI.mean}, std_dev={request.context.indices_summary.NDVI.std_dev}")
+        logger.info("✅ AI report request received from user %s", current_user.id)
+        if logger.isEnabledFor(logging.INFO):
+            field_info, ndvi = request.context.field_info, request.context.indices_summary.NDVI
+            logger.info("Field: %s, Area: %s ha", field_info.name, field_info.area_ha)
+            logger.info("NDVI stats: mean=%s, std_dev=%s", ndvi.mean, ndvi.std_dev)
         
         # Check if AI service is available
         if not ai_agronomist_service.is_available():
@@ -878,28 +1163,28 @@ async def generate_ai_report(
                 detail="AI service temporarily unavailable. Please ensure GEMINI_API_KEY is configured."
             )
         
-        # Generate report
-        report_response = await ai_agronomist_service.generate_report(
-            context=request.context
-        )
+        # Generate report (or reuse one for the same context)
+        report_response, cache_hit = await _cached_report(request)
         
-        logger.info(f"AI report generated successfully in {report_response.generation_time_seconds}s")
+        if cache_hit:
+            logger.info("AI report served from cache")
+        else:
+            logger.info("AI report generated successfully in %ss", report_response.generation_time_seconds)
         
-        return report_response
+        # Serialize straight to JSON bytes (by_alias keeps the public "model_used" key)
+        return Response(
+            content=report_response.model_dump_json(by_alias=True),
+            media_type="application/json",
+            headers={"X-Cache": "HIT" if cache_hit else "MISS"}
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to generate AI report: {e}", exc_info=True)
+        logger.error("Failed to generate AI report: %s", e, exc_info=True)
         
         # Return structured error response
-        error_type = "api_error"
-        if "timeout" in str(e).lower():
-            error_type = "api_timeout"
-        elif "quota" in str(e).lower() or "rate" in str(e).lower():
-            error_type = "quota_exceeded"
-        elif "not available" in str(e).lower():
-            error_type = "service_unavailable"
+        error_type = classify_error(e)
         
         raise HTTPException(
             status_code=500,
@@ -912,10 +1197,253 @@ async def generate_ai_report(
         )
 
 
+def _sse_event(payload: dict) -> str:
+    """One Server-Sent Events message with a JSON payload"""
+    return f"data: {orjson.dumps(payload).decode('utf-8')}\n\n"
+
+
+@router.post("/analysis/ai_report/stream")
+async def stream_ai_report(
+    request: AIReportRequest,
+    current_user: User = Depends(get_ai_rate_limited_user)
+):
+    """
+    Generate an AI agronomist report, streamed as Server-Sent Events
+    
+    The report Markdown arrives in chunks as it is generated, so the first text shows
+    up after the first tokens rather than after the whole report. Events (JSON data):
+    - {"type": "chunk", "text": ...} for each piece of the report
+    - {"type": "done", "generation_time_seconds": ..., "model_used": ...} at the end
+    - {"type": "error", "error_type": ..., "message": ..., "details": ...} on failure
+    
+    /analysis/ai_report stays available for clients that want the whole report at once.
+    
+    Args:
+        request: AI report request with complete analysis context
+        current_user: Authenticated user
+        
+    Returns:
+        text/event-stream response
+    """
+    logger.info("AI report stream requested by user %s", current_user.id)
+    
+    if not ai_agronomist_service.is_available():
+        raise HTTPException(
+            status_code=503,
+            detail="AI service temporarily unavailable. Please ensure GEMINI_API_KEY is configured."
+        )
+    
+    async def event_stream():
+        start_time = time.time()
+        try:
+            async for text in ai_agronomist_service.stream_report(request.context):
+                yield _sse_event({"type": "chunk", "text": text})
+        except Exception as e:
+            yield _sse_event({
+                "type": "error",
+                "error_type": classify_error(e),
+                "message": "Не удалось сгенерировать AI отчет",
+                "details": str(e)
+            })
+            return
+        generation_time = round(time.time() - start_time, 2)
+        logger.info("AI report streamed in %ss", generation_time)
+        yield _sse_event({
+            "type": "done",
+            "generation_time_seconds": generation_time,
+            "model_used": ai_agronomist_service.model_name
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # No caching, and no proxy buffering that would hold chunks back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/analysis/ai_report/batch", response_model=AIReportBatchResponse)
+async def generate_ai_report_batch(
+    request: AIReportBatchRequest,
+    current_user: User = Depends(get_ai_rate_limited_user)
+):
+    """
+    Generate AI agronomist reports for several fields (up to 8) in one LLM call
+    
+    Intended for dashboards that need a summary per field: one Gemini request
+    instead of one per field, which matters once the API key is rate-limited.
+    
+    Args:
+        request: Analysis contexts of the fields
+        current_user: Authenticated user
+        
+    Returns:
+        AIReportBatchResponse with one Markdown report per context, in request order
+    """
+    try:
+        logger.info("AI batch report request for %s fields from user %s", len(request.contexts), current_user.id)
+        
+        if not ai_agronomist_service.is_available():
+            raise HTTPException(
+                status_code=503,
+                detail="AI service temporarily unavailable. Please ensure GEMINI_API_KEY is configured."
+            )
+        
+        batch_response = await ai_agronomist_service.generate_reports_batch(request.contexts)
+        
+        return Response(content=batch_response.model_dump_json(by_alias=True), media_type="application/json")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to generate AI batch report: %s", e, exc_info=True)
+        
+        error_type = classify_error(e)
+        
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "status": "error",
+                "error_type": error_type,
+                "message": "Не удалось сгенерировать AI отчеты",
+                "details": str(e)
+            }
+        )
+
+
+# Batch API jobs are polled when their state is read (at most every REPORT_JOB_POLL_SECONDS),
+# so no background poller has to survive restarts
+REPORT_JOB_POLL_SECONDS = 15
+_REPORT_JOB_STATUS = {
+    "JOB_STATE_RUNNING": "running",
+    "JOB_STATE_SUCCEEDED": "succeeded",
+    "JOB_STATE_FAILED": "failed",
+    "JOB_STATE_CANCELLED": "failed",
+    "JOB_STATE_EXPIRED": "failed",
+}
+
+
+def _report_job_response(job: AIReportJob, http_request: Request) -> AIReportJobResponse:
+    """API view of a report job; reports carry the job's total turnaround time"""
+    reports = None
+    if job.status == "succeeded" and job.reports is not None:
+        elapsed = round((job.checked_at - job.created_at).total_seconds(), 2)
+        # Reports were checked to be strings when the batch result was stored
+        reports = [
+            AIReportResponse.model_construct(
+                status="success",
+                report_markdown=report,
+                generation_time_seconds=elapsed,
+                model_used=ai_agronomist_service.model_name
+            )
+            for report in job.reports
+        ]
+    return AIReportJobResponse(
+        job_id=job.id,
+        status=job.status,
+        poll_url=http_request.url_for("get_ai_report_job", job_id=job.id).path,
+        reports=reports,
+        error=job.error
+    )
+
+
+@router.post("/analysis/ai_report/async", response_model=AIReportJobResponse, status_code=202)
+async def submit_ai_report_job(
+    request: AIReportBatchRequest,
+    http_request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit AI reports for several fields to the Gemini Batch API
+    
+    For non-interactive generation (dashboard "refresh all fields"): batch jobs cost
+    about half as much and are not subject to per-minute rate limits, but may take
+    minutes to complete. Poll the returned poll_url for the result.
+    
+    Args:
+        request: Analysis contexts of the fields
+        http_request: Incoming request (used to build the poll URL)
+        current_user: Authenticated user
+        db: Database session
+        
+    Returns:
+        AIReportJobResponse with the job ID and poll URL (202 Accepted)
+    """
+    if not ai_agronomist_service.is_batch_available():
+        raise HTTPException(
+            status_code=503,
+            detail="AI batch reports unavailable. Please ensure google-genai is installed and GEMINI_API_KEY is configured."
+        )
+    
+    job_id = str(uuid.uuid4())
+    try:
+        batch_name = await asyncio.get_running_loop().run_in_executor(
+            AI_EXECUTOR, ai_agronomist_service.submit_report_batch, request.contexts, f"agrosky-report-{job_id}"
+        )
+    except Exception as e:
+        logger.error("Failed to submit AI report batch: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to submit AI report batch: {str(e)}")
+    
+    job = AIReportJob(
+        id=job_id,
+        user_id=current_user.id,
+        batch_name=batch_name,
+        status="pending",
+        num_contexts=len(request.contexts)
+    )
+    await run_db(_add_and_commit, db, job)
+    logger.info("AI report job %s (%s) created for user %s", job_id, batch_name, current_user.id)
+    
+    return _report_job_response(job, http_request)
+
+
+@router.get("/analysis/ai_report/job/{job_id}", response_model=AIReportJobResponse)
+async def get_ai_report_job(
+    job_id: str,
+    http_request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the state of an asynchronous AI report job, with the reports once succeeded
+    
+    Args:
+        job_id: Report job ID
+        http_request: Incoming request (used to build the poll URL)
+        current_user: Authenticated user
+        db: Database session
+        
+    Returns:
+        AIReportJobResponse
+    """
+    job = await run_db(db.get, AIReportJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    
+    now = datetime.utcnow()
+    if job.status in ("pending", "running") and (
+        job.checked_at is None or (now - job.checked_at).total_seconds() >= REPORT_JOB_POLL_SECONDS
+    ):
+        try:
+            state, reports, error = await asyncio.get_running_loop().run_in_executor(
+                AI_EXECUTOR, ai_agronomist_service.get_report_batch, job.batch_name
+            )
+            job.status = _REPORT_JOB_STATUS.get(state, "pending")
+            job.reports = reports
+            job.error = error
+        except Exception as e:
+            logger.warning("Failed to poll AI report job %s: %s", job_id, e)
+        job.checked_at = now
+        await run_db(_add_and_commit, db, job)
+    
+    return _report_job_response(job, http_request)
+
+
 @router.post("/analysis/ai_chat", response_model=AIChatResponse)
 async def ai_chat(
     request: AIChatRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_ai_rate_limited_user)
 ):
     """
     Interactive AI chat with RAG (Retrieval-Augmented Generation)
@@ -931,8 +1459,9 @@ async def ai_chat(
         AIChatResponse with AI-generated answer
     """
     try:
-        logger.info(f"AI chat requested by user {current_user.id}")
-        logger.debug(f"Question: {request.new_question[:100]}...")
+        logger.info("AI chat requested by user %s", current_user.id)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Question: %s...", request.new_question[:100])
         
         # Check if AI service is available
         if not ai_agronomist_service.is_available():
@@ -941,37 +1470,20 @@ async def ai_chat(
                 detail="AI service temporarily unavailable. Please ensure GEMINI_API_KEY is configured."
             )
         
-        # Validate question length
-        if len(request.new_question.strip()) < 3:
-            raise HTTPException(
-                status_code=400,
-                detail="Question too short. Please provide a meaningful question."
-            )
-        
         # Generate chat response
-        chat_response = await ai_agronomist_service.chat(
-            original_context=request.original_context,
-            chat_history=request.chat_history,
-            new_question=request.new_question
-        )
+        chat_response = await _coalesced_chat(request)
         
-        logger.info(f"AI chat response generated in {chat_response.generation_time_seconds}s")
+        logger.info("AI chat response generated in %ss", chat_response.generation_time_seconds)
         
         return chat_response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to generate AI chat response: {e}", exc_info=True)
+        logger.error("Failed to generate AI chat response: %s", e, exc_info=True)
         
         # Return structured error response
-        error_type = "api_error"
-        if "timeout" in str(e).lower():
-            error_type = "api_timeout"
-        elif "quota" in str(e).lower() or "rate" in str(e).lower():
-            error_type = "quota_exceeded"
-        elif "not available" in str(e).lower():
-            error_type = "service_unavailable"
+        error_type = classify_error(e)
         
         raise HTTPException(
             status_code=500,
@@ -998,5 +1510,6 @@ async def ai_health_check():
         "status": "available" if is_available else "unavailable",
         "service": "Google Gemini AI",
         "model": ai_agronomist_service.model_name if is_available else None,
+        "context_cache_entries": ai_agronomist_service.context_cache_size(),
         "message": "AI service is ready" if is_available else "AI service not configured (missing GEMINI_API_KEY)"
     }
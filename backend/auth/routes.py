@@ -3,11 +3,15 @@ Authentication routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import logging
+import os
 
-from database import get_db
+from database import get_async_db
 from database.models import User
 from .schemas import (
     UserRegister, UserLogin, Token, UserResponse, MessageResponse,
@@ -19,9 +23,13 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+# bcrypt is CPU-bound (~100-300 ms per hash) and releases the GIL, so hashing on a
+# dedicated pool keeps the event loop free without sharing the default executor
+PASSWORD_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="bcrypt")
+
 
 @router.post("/register", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user
     
@@ -30,12 +38,14 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     
     Returns success message on successful registration
     """
-    logger.info(f"Registration attempt for email: {user_data.email}")
-    
-    # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
-        logger.warning(f"Registration failed: User with email {user_data.email} already exists")
+    logger.info("Registration attempt for email: %s", user_data.email)
+    
+    # Check if user already exists: an id-only probe on the unique email index, kept
+    # before hashing so duplicates do not cost a bcrypt round. Concurrent registrations
+    # that both pass it are caught by the IntegrityError handler below
+    result = await db.execute(select(User.id).where(User.email == user_data.email).limit(1))
+    if result.scalar() is not None:
+        logger.warning("Registration failed: User with email %s already exists", user_data.email)
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User with this email already exists"
@@ -43,32 +53,34 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     
     # Create new user
     try:
-        hashed_pwd = hash_password(user_data.password)
+        hashed_pwd = await asyncio.get_running_loop().run_in_executor(
+            PASSWORD_EXECUTOR, hash_password, user_data.password
+        )
         new_user = User(
             email=user_data.email,
             hashed_password=hashed_pwd
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         
-        logger.info(f"User registered successfully: {new_user.email} (ID: {new_user.id})")
+        logger.info("User registered successfully: %s (ID: %s)", new_user.email, new_user.id)
         
-        return MessageResponse(
+        return MessageResponse.model_construct(
             status="success",
             message="User registered successfully"
         )
     
     except IntegrityError as e:
-        db.rollback()
-        logger.error(f"Database integrity error during registration: {str(e)}")
+        await db.rollback()
+        logger.error("Database integrity error during registration: %s", e)
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User with this email already exists"
         )
     except Exception as e:
-        db.rollback()
-        logger.error(f"Unexpected error during registration: {str(e)}", exc_info=True)
+        await db.rollback()
+        logger.error("Unexpected error during registration: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred during registration: {str(e)}"
@@ -76,7 +88,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate user and return JWT token
     
@@ -85,14 +97,18 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
     
     Returns JWT access token on successful authentication
     """
-    logger.info(f"Login attempt for email: {user_data.email}")
+    logger.info("Login attempt for email: %s", user_data.email)
     
     # Find user by email
-    user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    user = result.scalar_one_or_none()
     
     # Verify user exists and password is correct
-    if not user or not verify_password(user_data.password, user.hashed_password):
-        logger.warning(f"Login failed for email: {user_data.email}")
+    password_ok = bool(user) and await asyncio.get_running_loop().run_in_executor(
+        PASSWORD_EXECUTOR, verify_password, user_data.password, user.hashed_password
+    )
+    if not password_ok:
+        logger.warning("Login failed for email: %s", user_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -102,9 +118,10 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
     # Create access token
     access_token = create_access_token(data={"user_id": user.id, "email": user.email})
     
-    logger.info(f"Login successful for user: {user.email} (ID: {user.id})")
+    logger.info("Login successful for user: %s (ID: %s)", user.email, user.id)
     
-    return Token(
+    # Constant strings and a token we just signed: nothing to validate
+    return Token.model_construct(
         status="success",
         message="Login successful",
         access_token=access_token,
@@ -121,14 +138,9 @@ async def get_me(current_user: User = Depends(get_current_user)):
     
     Returns current user data
     """
-    logger.info(f"User info requested for: {current_user.email} (ID: {current_user.id})")
+    logger.info("User info requested for: %s (ID: %s)", current_user.email, current_user.id)
     
-    return UserResponse(
-        status="success",
-        id=current_user.id,
-        email=current_user.email,
-        created_at=current_user.created_at
-    )
+    return UserResponse.model_validate(current_user)
 
 
 @router.get("/me/profile", response_model=UserProfileResponse)
@@ -140,29 +152,16 @@ async def get_user_profile(current_user: User = Depends(get_current_user)):
     
     Returns complete user profile including personal and farm information
     """
-    logger.info(f"Profile requested for user: {current_user.email} (ID: {current_user.id})")
-    
-    return UserProfileResponse(
-        id=current_user.id,
-        email=current_user.email,
-        full_name=current_user.full_name,
-        farm_name=current_user.farm_name,
-        country=current_user.country,
-        region=current_user.region,
-        phone_number=current_user.phone_number,
-        preferred_units=current_user.preferred_units,
-        primary_crops=current_user.primary_crops,
-        farming_type=current_user.farming_type,
-        irrigation_method=current_user.irrigation_method,
-        created_at=current_user.created_at
-    )
+    logger.info("Profile requested for user: %s (ID: %s)", current_user.email, current_user.id)
+    
+    return UserProfileResponse.model_validate(current_user)
 
 
 @router.put("/me/profile", response_model=UserProfileResponse)
 async def update_user_profile(
     profile_data: UserProfileUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update user profile information
@@ -171,7 +170,7 @@ async def update_user_profile(
     
     Allows updating personal and farm-related information
     """
-    logger.info(f"Profile update requested for user: {current_user.email} (ID: {current_user.id})")
+    logger.info("Profile update requested for user: %s (ID: %s)", current_user.email, current_user.id)
     
     try:
         # Update only provided fields
@@ -180,29 +179,16 @@ async def update_user_profile(
         for field, value in update_data.items():
             setattr(current_user, field, value)
         
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        await db.refresh(current_user)
         
-        logger.info(f"Profile successfully updated for user: {current_user.email}")
+        logger.info("Profile successfully updated for user: %s", current_user.email)
         
-        return UserProfileResponse(
-            id=current_user.id,
-            email=current_user.email,
-            full_name=current_user.full_name,
-            farm_name=current_user.farm_name,
-            country=current_user.country,
-            region=current_user.region,
-            phone_number=current_user.phone_number,
-            preferred_units=current_user.preferred_units,
-            primary_crops=current_user.primary_crops,
-            farming_type=current_user.farming_type,
-            irrigation_method=current_user.irrigation_method,
-            created_at=current_user.created_at
-        )
+        return UserProfileResponse.model_validate(current_user)
     
     except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to update profile for user {current_user.email}: {e}", exc_info=True)
+        await db.rollback()
+        logger.error("Failed to update profile for user %s: %s", current_user.email, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update profile: {str(e)}"
@@ -2,10 +2,15 @@
 Pydantic schemas for authentication and user profile
 """
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
+import re
+
+
+# Everything except ASCII digits, stripped from phone numbers in one C-level scan
+_NON_DIGIT_RE = re.compile(r"[^0-9]")
 
 
 class PreferredUnits(str, Enum):
@@ -38,9 +43,9 @@ class UserRegister(BaseModel):
     @field_validator('password')
     @classmethod
     def validate_password(cls, v):
-        if len(v) < 6:
-            raise ValueError('Password must be at least 6 characters long')
-        if len(v.encode('utf-8')) > 72:
+        # Length in characters is checked by pydantic-core (Field constraints above);
+        # only bcrypt's 72-byte limit needs Python, and up to 18 characters cannot exceed it
+        if len(v) > 18 and len(v.encode('utf-8')) > 72:
             raise ValueError('Password is too long (max 72 bytes)')
         return v
 
@@ -49,8 +54,18 @@ class UserLogin(BaseModel):
     """
     Schema for user login
     """
-    email: EmailStr = Field(..., description="User email address")
+    email: str = Field(..., max_length=254, description="User email address")
     password: str = Field(..., description="User password")
+    
+    @field_validator('email')
+    @classmethod
+    def validate_email(cls, v):
+        # Only a lookup key here: the full EmailStr (email-validator) check runs at registration.
+        # Lowercasing the domain matches the normalized address EmailStr stored
+        local, at, domain = v.strip().rpartition("@")
+        if not at or not local or not domain:
+            raise ValueError('Invalid email address')
+        return f"{local}@{domain.lower()}"
 
 
 class Token(BaseModel):
@@ -72,8 +87,7 @@ class UserResponse(BaseModel):
     email: str
     created_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class MessageResponse(BaseModel):
@@ -103,20 +117,14 @@ class UserProfileUpdate(BaseModel):
     def validate_phone(cls, v):
         if v is None:
             return v
-        # Basic phone validation
-        clean = ''.join(filter(str.isdigit, v))
+        # Basic phone validation; digit-only numbers (what the frontend sends) need no scan.
+        # isascii: str.isdigit alone also accepts non-ASCII digits, which the scan strips
+        if len(v) >= 10 and v.isascii() and v.isdigit():
+            return v
+        clean = _NON_DIGIT_RE.sub("", v)
         if len(clean) < 10:
             raise ValueError('Номер телефона должен содержать минимум 10 цифр')
         return v
-    
-    @field_validator('primary_crops')
-    @classmethod
-    def validate_crops(cls, v):
-        if v is None:
-            return v
-        if len(v) > 20:
-            raise ValueError('Максимум 20 культур')
-        return v
 
 
 class UserProfileResponse(BaseModel):
@@ -136,6 +144,5 @@ class UserProfileResponse(BaseModel):
     irrigation_method: Optional[str] = None
     created_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
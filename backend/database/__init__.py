@@ -2,8 +2,13 @@
 Database initialization and configuration
 """
 
-from .database import engine, SessionLocal, Base, get_db
+from .database import (
+    engine, SessionLocal, Base, get_db, async_engine, AsyncSessionLocal, get_async_db, DB_EXECUTOR, run_db
+)
 from .models import User
 
-__all__ = ["engine", "SessionLocal", "Base", "get_db", "User"]
+__all__ = [
+    "engine", "SessionLocal", "Base", "get_db",
+    "async_engine", "AsyncSessionLocal", "get_async_db", "DB_EXECUTOR", "run_db", "User"
+]
 
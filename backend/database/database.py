@@ -2,31 +2,100 @@
 Database configuration and session management
 """
 
-from sqlalchemy import create_engine
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import asyncio
 import os
 
 # Database URL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./agrosky.db")
 
+# Connection pool: room for every DB_EXECUTOR thread plus bursts; connections dropped by the
+# server (restarts, idle timeouts) are detected before use and recycled every 30 minutes
+POOL_OPTIONS = {"pool_size": 20, "max_overflow": 40, "pool_pre_ping": True, "pool_recycle": 1800}
+
 # Create engine
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=False
+    echo=False,
+    # Compiled SQL cache: repeated route statements skip compilation
+    query_cache_size=1200,
+    # SQLite has a single writer and its own pool classes, which take no pool sizing
+    **({} if "sqlite" in DATABASE_URL else POOL_OPTIONS)
+)
+
+# SQLite settings for a web server: WAL lets readers proceed during a write, synchronous=NORMAL
+# syncs the WAL at checkpoints instead of on every commit (still safe against corruption),
+# temp tables, page cache (64 MB) and memory-mapped I/O (256 MB) stay in memory
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
 )
 
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Apply SQLITE_PRAGMAS to every new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+if DATABASE_URL.startswith("sqlite"):
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str) -> str:
+    """The same database through an asyncio driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    return url
+
+
+# Async engine for request handlers that must not block the event loop on DB round trips.
+# The sync engine above stays in use for table creation and the remaining routes
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_database_url(DATABASE_URL))
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    query_cache_size=1200,
+    # aiosqlite uses NullPool, which takes no pool sizing
+    **({} if ASYNC_DATABASE_URL.startswith("sqlite") else POOL_OPTIONS)
+)
+
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+# expire_on_commit=False: objects stay readable after commit without a lazy refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Blocking sync-Session work of async route handlers runs here, off the event loop and
+# apart from the default executor, so it does not queue behind other threadpool work
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix="db")
+
 # Create base class for models
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
     Dependency function to get database session
+
+    Declared async so FastAPI does not dispatch the session setup and teardown to its
+    threadpool on every request: creating a Session does no I/O, and the routes using
+    it already run on the event loop
     """
     db = SessionLocal()
     try:
@@ -34,3 +103,20 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """
+    Dependency function to get an async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_db(fn, *args):
+    """
+    Run a blocking database call (sync Session work) on DB_EXECUTOR
+
+    A Session is not thread-safe: the caller awaits each call before the next one, so
+    the request's session is only ever used by one thread at a time
+    """
+    return await asyncio.get_running_loop().run_in_executor(DB_EXECUTOR, fn, *args)
@@ -2,7 +2,7 @@
 Database models
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -44,6 +44,12 @@ class Field(Base):
     Field model for storing user's agricultural fields
     """
     __tablename__ = "fields"
+    __table_args__ = (
+        # Ownership checks filter by (user_id, id)
+        Index("ix_fields_user_id_id", "user_id", "id"),
+        # The field list of a user is read newest first
+        Index("ix_fields_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -64,6 +70,12 @@ class DashboardItem(Base):
     Dashboard item model for storing saved analyses
     """
     __tablename__ = "dashboard_items"
+    __table_args__ = (
+        # Ownership checks filter by (user_id, id)
+        Index("ix_dashitems_user_id_id", "user_id", "id"),
+        # The dashboard of a user is read in display_order
+        Index("ix_dashitems_user_id_display_order", "user_id", "display_order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -82,3 +94,44 @@ class DashboardItem(Base):
     def __repr__(self):
         return f"<DashboardItem(id={self.id}, type={self.item_type}, field_id={self.field_id})>"
 
+
+
+class AnalysisRecord(Base):
+    """
+    Analysis record: maps an analysis_id to its results directory
+    """
+    __tablename__ = "analysis_records"
+    __table_args__ = (
+        # Latest analysis of a field: WHERE field_id = ? ORDER BY created_at DESC
+        Index("ix_analysis_records_field_id_created_at", "field_id", "created_at"),
+    )
+
+    id = Column(String(36), primary_key=True)  # analysis UUID
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    field_id = Column(Integer, ForeignKey("fields.id", ondelete="SET NULL"), nullable=True)
+    status = Column(String, nullable=False, default="completed")
+    path = Column(String, nullable=False)  # results directory
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<AnalysisRecord(id={self.id}, status={self.status})>"
+
+
+class AIReportJob(Base):
+    """
+    Asynchronous AI report job: a Gemini Batch API job and its results
+    """
+    __tablename__ = "ai_report_jobs"
+
+    id = Column(String(36), primary_key=True)  # job UUID
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    batch_name = Column(String, nullable=True)  # Gemini batch job name ("batches/...")
+    status = Column(String, nullable=False, default="pending")  # pending, running, succeeded, failed
+    num_contexts = Column(Integer, nullable=False)
+    reports = Column(JSON, nullable=True)  # Markdown reports in request order, once succeeded
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    checked_at = Column(DateTime(timezone=True), nullable=True)  # last Gemini status poll
+
+    def __repr__(self):
+        return f"<AIReportJob(id={self.id}, status={self.status}, user_id={self.user_id})>"
@@ -4,11 +4,14 @@ FastAPI application for satellite data analysis
 """
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html, get_swagger_ui_oauth2_redirect_html
 from fastapi.exceptions import RequestValidationError
+from contextlib import asynccontextmanager
 import uvicorn
-from pathlib import Path
+import asyncio
 import logging
 import os
 
@@ -24,10 +27,13 @@ try:
 except ImportError:
     pass  # config.py not found or credentials not set
 
-from api.routes import router as api_router
+from api.routes import router as api_router, sentinel_service
 from api.forecast_routes import router as forecast_router
-from auth.routes import router as auth_router
-from database import Base, engine
+from auth.routes import router as auth_router, PASSWORD_EXECUTOR
+from database import Base, engine, async_engine, DB_EXECUTOR
+from services.forecast_service import warm_up_forecast_service
+from services.ai_agronomist import ai_agronomist_service, AI_EXECUTOR
+from services.results_storage import result_directories
 
 # Configure logging
 logging.basicConfig(
@@ -36,48 +42,139 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def init_storage() -> None:
+    """Таблицы БД и каталоги результатов
+    (новые колонки и индексы существующих таблиц добавляет migrate_db.py)"""
+    logger.info("Creating database tables...")
+    Base.metadata.create_all(bind=engine)
+    logger.info("Database tables created successfully")
+
+    for results_dir in result_directories():
+        results_dir.mkdir(parents=True, exist_ok=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Инициализация БД и каталогов при старте процесса, а не при импорте модуля
+    (импорт с --reload и в каждом воркере обходится без запросов к БД).
+    Прогрев при старте: первый запрос не должен платить за JIT, генерацию OpenAPI-схемы
+    и установку соединения с Gemini.
+    При остановке закрываются пулы HTTP-соединений, пулы потоков (пароли, БД, Gemini) и async-движок БД."""
+    # Схема БД (ввод-вывод) и JIT прогноза (CPU) готовятся параллельно в потоках
+    await asyncio.gather(asyncio.to_thread(init_storage), asyncio.to_thread(warm_up_forecast_service))
+    openapi_json_body()
+    # Соединения с Gemini открываются в фоне: старт не ждет сети
+    gemini_warm_up = asyncio.create_task(ai_agronomist_service.warm_up())
+    logger.info("Warm-up completed")
+    yield
+    gemini_warm_up.cancel()
+    sentinel_service.close()
+    PASSWORD_EXECUTOR.shutdown(wait=False)
+    DB_EXECUTOR.shutdown(wait=False)
+    AI_EXECUTOR.shutdown(wait=False)
+    await async_engine.dispose()
+
+
 # Create FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="AgroSky Insight API",
     description="Agricultural field monitoring using Sentinel-2 satellite data",
-    version="1.0.0"
+    version="1.0.0",
+    # /openapi.json и страницы документации регистрируются ниже, чтобы отдавать схему из кэша
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None
 )
 
+
+class AIBodySizeLimitMiddleware:
+    """413 для AI-запросов с Content-Length больше лимита: тело даже не читается и не валидируется"""
+
+    AI_PATH_PREFIX = "/api/v1/analysis/ai_"
+
+    def __init__(self, app, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.AI_PATH_PREFIX):
+            content_length = dict(scope["headers"]).get(b"content-length")
+            if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_bytes:
+                response = JSONResponse(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    content={"detail": f"Request body too large (limit {self.max_body_bytes // 1024} KB)"}
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+# Контекст анализа с историей чата занимает единицы-десятки KB.
+# Добавляется до CORS, чтобы ответ 413 тоже получил CORS-заголовки
+app.add_middleware(AIBodySizeLimitMiddleware, max_body_bytes=256 * 1024)
+
+
 # Configure CORS
+# Only explicit origins: with allow_credentials a wildcard would let any Render.com app
+# make authenticated requests (Starlette compares allow_origins entries with ==)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
-        "http://localhost:3000", 
+        "http://localhost:3000",
         "http://localhost:5173",
         "https://agrosky-frontend.onrender.com",  # Production frontend URL
-        "https://*.onrender.com"  # Allow all Render.com subdomains
     ],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Create database tables
-logger.info("Creating database tables...")
-Base.metadata.create_all(bind=engine)
-logger.info("Database tables created successfully")
 
-# Create results directory if it doesn't exist
-results_dir = Path("results")
-results_dir.mkdir(exist_ok=True)
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip для JSON/Markdown-ответов; PNG/ZIP уже сжаты, а SSE-поток gzip задерживал бы буферизацией"""
+
+    EXCLUDED_PREFIXES = ("/results", "/api/v1/downloads")
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "") if scope["type"] == "http" else ""
+        if path.startswith(self.EXCLUDED_PREFIXES) or path.endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Многокилобайтные отчеты AI и ответы анализа сжимаются в 5-10 раз
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024)
+
+
+class ResultsStaticFiles(StaticFiles):
+    """StaticFiles over several directories, searched in order (hot storage first)"""
+
+    def __init__(self, directories):
+        # check_dir=False: the directories are created by init_storage at startup
+        super().__init__(directory=directories[-1], check_dir=False)
+        self.all_directories = list(directories)
+
 
 # Mount static files for results
-app.mount("/results", StaticFiles(directory="results"), name="results")
+app.mount("/results", ResultsStaticFiles(result_directories()), name="results")
 
 # Добавляем exception handler для ValidationError
+# Тело в логе и ответе обрезается: GeoJSON полей бывает в мегабайты
+VALIDATION_BODY_PREVIEW_CHARS = 2048
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    logger.error(f"❌ Validation error for {request.url.path}:")
-    logger.error(f"Body: {await request.body()}")
-    logger.error(f"Errors: {exc.errors()}")
+    # exc.body - тело, уже прочитанное FastAPI: поток запроса к этому моменту исчерпан,
+    # и повторный await request.body() ждал бы сообщения, которое не придет
+    errors = exc.errors()
+    body_preview = str(exc.body)[:VALIDATION_BODY_PREVIEW_CHARS]
+    logger.error("❌ Validation error for %s: errors=%s body=%s", request.url.path, errors, body_preview)
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content={"detail": exc.errors(), "body": str(await request.body())}
+        content={"detail": errors, "body": body_preview}
     )
 
 # Include API routes
@@ -86,6 +183,45 @@ app.include_router(api_router, prefix="/api/v1")
 app.include_router(forecast_router, prefix="/api/v1/forecast", tags=["ML Forecast"])
 
 
+# OpenAPI-схема строится и кодируется в JSON один раз за время жизни процесса
+_openapi_body: bytes = b""
+
+
+def openapi_json_body() -> bytes:
+    """Returns the encoded OpenAPI schema, building it on first use"""
+    global _openapi_body
+    if not _openapi_body:
+        _openapi_body = JSONResponse(app.openapi()).body
+    return _openapi_body
+
+
+@app.get("/openapi.json", include_in_schema=False)
+async def openapi_json():
+    """OpenAPI schema served from pre-encoded bytes"""
+    return Response(content=openapi_json_body(), media_type="application/json")
+
+
+@app.get("/docs", include_in_schema=False)
+async def swagger_ui_html():
+    """Swagger UI"""
+    return get_swagger_ui_html(
+        openapi_url="/openapi.json",
+        title=f"{app.title} - Swagger UI",
+        oauth2_redirect_url="/docs/oauth2-redirect"
+    )
+
+
+@app.get("/docs/oauth2-redirect", include_in_schema=False)
+async def swagger_ui_redirect():
+    return get_swagger_ui_oauth2_redirect_html()
+
+
+@app.get("/redoc", include_in_schema=False)
+async def redoc_html():
+    """ReDoc"""
+    return get_redoc_html(openapi_url="/openapi.json", title=f"{app.title} - ReDoc")
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -1,23 +1,90 @@
 """
-Database migration script to add new profile fields
+Database migration script to add new profile fields,
+new columns and indexes of existing tables
 """
 import sqlite3
 import os
 
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex
+
+from database.models import Base
+
 DB_PATH = "agrosky.db"
 
+# Columns added to tables after their first release: {table: {column: type}}
+NEW_TABLE_COLUMNS = {
+    'analysis_records': {
+        'field_id': 'INTEGER REFERENCES fields(id)'
+    }
+}
+
+
+def table_columns(cursor, table):
+    """Column names of a table (empty if the table does not exist yet)"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def run_script(conn, statements):
+    """Run statements as one script in one transaction (all or nothing)"""
+    try:
+        conn.executescript("BEGIN;\n" + ";\n".join(statements) + ";\nCOMMIT;")
+        return True
+    except Exception as e:
+        # A failed statement leaves nothing half-applied
+        if conn.in_transaction:
+            conn.rollback()
+        print(f"⚠️  Migration error: {e}")
+        return False
+
+
+def migrate_tables(conn):
+    """
+    Add new columns and indexes to existing tables
+
+    Base.metadata.create_all (run at application start) only creates missing tables,
+    so columns and indexes added to models later are applied here. Tables that do not
+    exist yet are skipped: create_all creates them complete.
+    """
+    cursor = conn.cursor()
+    existing_tables = {table.name for table in Base.metadata.sorted_tables if table_columns(cursor, table.name)}
+
+    statements = []
+    for table, columns in NEW_TABLE_COLUMNS.items():
+        if table not in existing_tables:
+            continue
+        existing_columns = table_columns(cursor, table)
+        for col_name, col_type in columns.items():
+            if col_name not in existing_columns:
+                print(f"➕ Adding column: {table}.{col_name}")
+                statements.append(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
+
+    # Index DDL comes from the models, so it cannot drift from database/models.py
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        for index in table.indexes:
+            statements.append(str(CreateIndex(index, if_not_exists=True).compile(dialect=sqlite.dialect())))
+
+    if statements and run_script(conn, statements):
+        print("✅ Table columns and indexes are up to date")
+
+
 def migrate():
-    """Add new profile fields to users table"""
+    """Add new profile fields to users table, new columns and indexes to other tables"""
     if not os.path.exists(DB_PATH):
         print("❌ Database file not found!")
         return
     
     conn = sqlite3.connect(DB_PATH)
+    # Same journal settings as the application (database/database.py): WAL, fsync at checkpoints
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     cursor = conn.cursor()
     
     # Get current columns
-    cursor.execute("PRAGMA table_info(users)")
-    existing_columns = [row[1] for row in cursor.fetchall()]
+    existing_columns = table_columns(cursor, "users")
     print(f"📊 Existing columns: {existing_columns}")
     
     # Define new columns
@@ -33,32 +100,29 @@ def migrate():
         'irrigation_method': 'TEXT'
     }
     
-    # Add missing columns
-    added_count = 0
-    for col_name, col_type in new_columns.items():
-        if col_name not in existing_columns:
-            try:
-                sql = f"ALTER TABLE users ADD COLUMN {col_name} {col_type}"
-                print(f"➕ Adding column: {col_name}")
-                cursor.execute(sql)
-                added_count += 1
-            except Exception as e:
-                print(f"⚠️  Error adding {col_name}: {e}")
+    # Add missing columns: one script in one transaction, so the journal is flushed once
+    missing_columns = [name for name in new_columns if name not in existing_columns]
+    for col_name in missing_columns:
+        print(f"➕ Adding column: {col_name}")
     
-    conn.commit()
-    conn.close()
+    added_count = 0
+    if missing_columns:
+        statements = [
+            f"ALTER TABLE users ADD COLUMN {col_name} {new_columns[col_name]}" for col_name in missing_columns
+        ]
+        if run_script(conn, statements):
+            added_count = len(missing_columns)
     
     if added_count > 0:
         print(f"\n✅ Migration complete! Added {added_count} columns.")
-    else:
+    elif not missing_columns:
         print("\n✅ All columns already exist!")
     
     # Verify
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA table_info(users)")
-    final_columns = [row[1] for row in cursor.fetchall()]
+    final_columns = table_columns(cursor, "users")
     print(f"\n📊 Final columns: {final_columns}")
+    
+    migrate_tables(conn)
     conn.close()
 
 if __name__ == "__main__":
@@ -7,23 +7,50 @@ import json
 import logging
 import time
 import asyncio
-from typing import Optional, Dict, Any, List
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
 from pathlib import Path
 
 try:
     import google.generativeai as genai
+    from google.generativeai import caching  # explicit context caching, google-generativeai >= 0.7
     GEMINI_AVAILABLE = True
 except ImportError:
     GEMINI_AVAILABLE = False
     logging.warning("google-generativeai not installed. AI features will be disabled.")
 
+# The Batch API (half-price, outside per-minute limits) is only in the newer google-genai SDK
+try:
+    from google import genai as genai_sdk
+    BATCH_API_AVAILABLE = True
+except ImportError:
+    BATCH_API_AVAILABLE = False
+
+# Typed Gemini API errors (shipped with google-generativeai via google-api-core)
+try:
+    from google.api_core import exceptions as google_exceptions
+    _TYPED_API_ERRORS = (
+        (google_exceptions.DeadlineExceeded, "api_timeout"),
+        (google_exceptions.ResourceExhausted, "quota_exceeded"),
+        (google_exceptions.TooManyRequests, "quota_exceeded"),
+        (google_exceptions.ServiceUnavailable, "service_unavailable"),
+    )
+except ImportError:
+    _TYPED_API_ERRORS = ()
+
 from api.ai_schemas import (
     AIAnalysisContext,
     AIReportResponse,
+    AIReportBatchResponse,
     AIChatResponse,
-    AIErrorResponse,
-    ChatMessage
+    AIErrorResponse
 )
+from services.rate_limit import gemini_limiter
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -70,6 +97,16 @@ SYSTEM_PROMPT_REPORT_GENERATION = """Ты — экспертный Цифров
 *Дисклеймер: Данный отчет сгенерирован автоматически на основе спутниковых данных. Точный диагноз требует наземного подтверждения агрономом.*
 """
 
+# Chat history roles of the API mapped to Gemini content roles
+_GEMINI_ROLES = {"user": "user", "assistant": "model"}
+
+# Constant parts of the single-field report prompt, joined once at import time
+_REPORT_PROMPT_PREFIX = (
+    SYSTEM_PROMPT_REPORT_GENERATION
+    + "\n\nПроанализируй следующие данные спутникового анализа поля и создай детальный отчет:\n\n```json\n"
+)
+_REPORT_PROMPT_SUFFIX = "\n```\n\nСледуй строго указанному формату Markdown из системного промпта."
+
 SYSTEM_PROMPT_CHAT = """Ты — AI Агроном-Консультант. Твоя основная задача — отвечать на вопросы пользователя, опираясь исключительно на предоставленные данные анализа поля (смотри блок [ANALYSIS_CONTEXT] в запросе пользователя).
 
 Правила взаимодействия:
@@ -81,6 +118,96 @@ SYSTEM_PROMPT_CHAT = """Ты — AI Агроном-Консультант. Тв
 """
 
 
+# ============================================================================
+# Context caching
+# ============================================================================
+
+# Lifetime of a cached chat context on the Gemini side
+CONTEXT_CACHE_TTL = timedelta(minutes=10)
+# A cache hit this close to expiry extends the TTL
+CONTEXT_CACHE_REFRESH_WINDOW = 60.0
+# Gemini rejects cached contents below this size
+CONTEXT_CACHE_MIN_TOKENS = 2048
+CONTEXT_CACHE_MAX_ENTRIES = 32
+
+# Blocking Gemini SDK calls run here rather than in the default executor, so a burst of
+# AI requests does not starve file and DB work (and the other way round)
+AI_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AI_MAX_CONCURRENCY", "8")),
+    thread_name_prefix="gemini"
+)
+
+# Startup connection warm-up gives up after this long (the first request then connects itself)
+WARM_UP_TIMEOUT_SECONDS = 10
+
+
+@lru_cache(maxsize=512)
+def _chat_context_intro(context_json: str) -> Tuple[str, str]:
+    """[ANALYSIS_CONTEXT] chat message and its sha256 (context cache key)"""
+    context_intro = f"""[ANALYSIS_CONTEXT]
+```json
+{context_json}
+```
+
+Это контекст анализа поля. Все твои ответы должны основываться на этих данных."""
+    return context_intro, hashlib.sha256(context_intro.encode("utf-8")).hexdigest()
+
+
+# Message keywords for errors without a typed cause, checked in order.
+# "rate limit" rather than "rate": the service's own messages say "Failed to generate ..."
+_ERROR_KEYWORDS = (
+    ("timeout", "api_timeout"),
+    ("timed out", "api_timeout"),
+    ("quota", "quota_exceeded"),
+    ("rate limit", "quota_exceeded"),
+    ("not available", "service_unavailable"),
+)
+
+
+def classify_error(e: Exception) -> str:
+    """
+    Error type for an AI service failure: api_timeout, quota_exceeded,
+    service_unavailable or api_error
+    
+    Typed Gemini errors in the exception chain are dispatched by class;
+    other errors fall back to a single scan of the lowercased message.
+    """
+    cause = e
+    while cause is not None:
+        for error_class, error_type in _TYPED_API_ERRORS:
+            if isinstance(cause, error_class):
+                return error_type
+        cause = cause.__cause__
+    
+    message = str(e).casefold()
+    for keyword, error_type in _ERROR_KEYWORDS:
+        if keyword in message:
+            return error_type
+    return "api_error"
+
+
+def _parse_batch_reports(text: str, expected: int) -> Optional[List[str]]:
+    """
+    Reports from a batch response: a JSON array of `expected` Markdown strings,
+    optionally wrapped in a ```json fence. None if the response has another shape.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    try:
+        reports = json.loads(text)
+    except ValueError:
+        return None
+    if (
+        not isinstance(reports, list)
+        or len(reports) != expected
+        or not all(isinstance(report, str) and report.strip() for report in reports)
+    ):
+        return None
+    return reports
+
+
 # ============================================================================
 # AI Agronomist Service
 # ============================================================================
@@ -103,6 +230,17 @@ class AIAgronomistService:
         self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
         self.timeout_seconds = 180  # Increased to 3 minutes for AI operations
         
+        # Chat contexts cached on the Gemini side, LRU by sha256 of the context:
+        # key -> (CachedContent, GenerativeModel bound to it, expires_at);
+        # CachedContent and model are None if the context is too small to cache
+        self._context_cache: "OrderedDict[str, Tuple[Any, Any, float]]" = OrderedDict()
+        self._context_cache_lock = threading.Lock()
+        self.generation_config = None
+        self.safety_settings = None
+        self._genai_client = None  # google-genai client for the Batch API
+        # Decided once here: is_available() runs on every AI request
+        self._available = False
+        
         if not GEMINI_AVAILABLE:
             logger.error("Google Generative AI library not available")
             return
@@ -141,22 +279,48 @@ class AIAgronomistService:
                 }
             ]
             
+            self.generation_config = generation_config
+            self.safety_settings = safety_settings
             self.model = genai.GenerativeModel(
                 model_name=self.model_name,
                 generation_config=generation_config,
                 safety_settings=safety_settings
             )
             
-            logger.info(f"AI Agronomist Service initialized with model: {self.model_name}")
+            self._available = True
+            logger.info("AI Agronomist Service initialized with model: %s", self.model_name)
             
         except Exception as e:
-            logger.error(f"Failed to initialize Gemini AI: {e}", exc_info=True)
+            logger.error("Failed to initialize Gemini AI: %s", e, exc_info=True)
             self.model = None
     
     
     def is_available(self) -> bool:
         """Check if AI service is available"""
-        return self.model is not None and GEMINI_AVAILABLE
+        return self._available
+    
+    
+    async def warm_up(self) -> None:
+        """
+        Open the Gemini connections (DNS, TLS, gRPC channels of the sync and async
+        clients) before the first request needs them. count_tokens is used as the
+        probe: it costs no generation quota. Failures are only logged
+        """
+        if not self.is_available():
+            return
+        
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    loop.run_in_executor(AI_EXECUTOR, self.model.count_tokens, "ping"),
+                    self.model.count_tokens_async("ping")
+                ),
+                timeout=WARM_UP_TIMEOUT_SECONDS
+            )
+            logger.info("Gemini connections warmed up")
+        except Exception as e:
+            logger.warning("Gemini warm-up failed: %s", e)
     
     
     def _format_context_for_prompt(self, context: AIAnalysisContext) -> str:
@@ -170,14 +334,200 @@ class AIAgronomistService:
             Formatted string representation
         """
         try:
-            # Convert to dict and format as JSON for LLM
-            context_dict = context.dict(exclude_none=True)
-            return json.dumps(context_dict, ensure_ascii=False, indent=2)
+            # Indented JSON rendered by pydantic-core in a single pass (non-ASCII kept as is)
+            return context.model_dump_json(exclude_none=True, indent=2)
         except Exception as e:
-            logger.error(f"Failed to format context: {e}")
+            logger.error("Failed to format context: %s", e)
             return "{}"
     
     
+    def context_cache_size(self) -> int:
+        """Number of chat contexts currently tracked by the context cache"""
+        with self._context_cache_lock:
+            return len(self._context_cache)
+    
+    
+    def _get_cached_context(self, context_intro: str, key: str) -> Optional[Any]:
+        """
+        Model bound to the Gemini cached content holding the chat system prompt and field context
+        
+        Blocking (network calls), run in an executor.
+        
+        Args:
+            context_intro: Formatted [ANALYSIS_CONTEXT] message
+            key: sha256 of context_intro
+            
+        Returns:
+            GenerativeModel built once per cached content, or None if the context is
+            below CONTEXT_CACHE_MIN_TOKENS or creating the cache failed
+        """
+        now = time.time()
+        with self._context_cache_lock:
+            entry = self._context_cache.get(key)
+            if entry is not None and entry[2] > now:
+                self._context_cache.move_to_end(key)
+            else:
+                entry = None
+        
+        if entry is not None:
+            cached, cached_model, expires_at = entry
+            if cached is not None and expires_at - now < CONTEXT_CACHE_REFRESH_WINDOW:
+                # Keep an active conversation's context alive
+                try:
+                    cached.update(ttl=CONTEXT_CACHE_TTL)
+                    with self._context_cache_lock:
+                        self._context_cache[key] = (cached, cached_model, now + CONTEXT_CACHE_TTL.total_seconds())
+                except Exception as e:
+                    logger.warning("Failed to extend context cache TTL: %s", e)
+            return cached_model
+        
+        cached = cached_model = None
+        try:
+            contents = [{"role": "user", "parts": [context_intro]}]
+            token_count = self.model.count_tokens([SYSTEM_PROMPT_CHAT, context_intro]).total_tokens
+            if token_count >= CONTEXT_CACHE_MIN_TOKENS:
+                cached = caching.CachedContent.create(
+                    model=self.model_name,
+                    system_instruction=SYSTEM_PROMPT_CHAT,
+                    contents=contents,
+                    ttl=CONTEXT_CACHE_TTL
+                )
+                cached_model = genai.GenerativeModel.from_cached_content(
+                    cached_content=cached,
+                    generation_config=self.generation_config,
+                    safety_settings=self.safety_settings
+                )
+                logger.info("Created context cache %s (%s tokens)", cached.name, token_count)
+        except Exception as e:
+            logger.warning("Context caching failed, sending full context: %s", e)
+        
+        # Small or failed contexts are remembered too, so they are not re-counted every turn
+        with self._context_cache_lock:
+            self._context_cache[key] = (cached, cached_model, now + CONTEXT_CACHE_TTL.total_seconds())
+            while len(self._context_cache) > CONTEXT_CACHE_MAX_ENTRIES:
+                self._context_cache.popitem(last=False)
+        return cached_model
+    
+    
+    def _send_chat(
+        self,
+        context_intro: str,
+        context_key: str,
+        gemini_history: List[Dict[str, Any]],
+        new_question: str
+    ):
+        """
+        Send a chat turn, referencing the cached context when available
+        
+        The client sends the whole conversation with every turn, so it goes out as the
+        contents of a single generate_content call; no ChatSession is needed.
+        Blocking (Gemini SDK calls are synchronous), run in an executor.
+        """
+        cached_model = self._get_cached_context(context_intro, context_key)
+        if cached_model is not None:
+            # System prompt and context live in the cache: send only the conversation
+            response = cached_model.generate_content(
+                gemini_history + [{"role": "user", "parts": (new_question,)}]
+            )
+            usage = getattr(response, "usage_metadata", None)
+            logger.info("Chat used context cache: %s cached tokens", getattr(usage, "cached_content_token_count", 0))
+            return response
+        
+        # Build user message with context (only on first message)
+        if len(gemini_history) == 0:
+            full_question = f"{SYSTEM_PROMPT_CHAT}\n\n{context_intro}\n\nВопрос пользователя: {new_question}"
+        else:
+            full_question = new_question
+        return self.model.generate_content(gemini_history + [{"role": "user", "parts": (full_question,)}])
+    
+    
+    def _report_prompt(self, context: AIAnalysisContext) -> str:
+        """Full single-field report prompt: system prompt plus the formatted context"""
+        return _REPORT_PROMPT_PREFIX + self._format_context_for_prompt(context) + _REPORT_PROMPT_SUFFIX
+    
+    
+    def is_batch_available(self) -> bool:
+        """Check if reports can be submitted to the Gemini Batch API"""
+        return BATCH_API_AVAILABLE and bool(self.api_key)
+    
+    
+    def _batch_client(self):
+        """google-genai client, created on first batch use"""
+        if self._genai_client is None:
+            self._genai_client = genai_sdk.Client(api_key=self.api_key)
+        return self._genai_client
+    
+    
+    def submit_report_batch(
+        self,
+        contexts: List[AIAnalysisContext],
+        display_name: str
+    ) -> str:
+        """
+        Submit one report request per context as an inline Gemini batch job
+        
+        Blocking (network call), run in an executor.
+        
+        Returns:
+            Batch job name to poll with get_report_batch
+        """
+        requests = [
+            {"contents": [{"role": "user", "parts": [{"text": self._report_prompt(context)}]}]}
+            for context in contexts
+        ]
+        job = self._batch_client().batches.create(
+            model=self.model_name,
+            src=requests,
+            config={"display_name": display_name}
+        )
+        logger.info("Submitted report batch %s with %d requests", job.name, len(requests))
+        return job.name
+    
+    
+    def get_report_batch(self, batch_name: str) -> Tuple[str, Optional[List[str]], Optional[str]]:
+        """
+        Current state of a report batch job
+        
+        Blocking (network call), run in an executor.
+        
+        Returns:
+            (state name, reports in request order once succeeded, error message)
+        """
+        job = self._batch_client().batches.get(name=batch_name)
+        state = job.state.name if hasattr(job.state, "name") else str(job.state)
+        if state != "JOB_STATE_SUCCEEDED":
+            error = str(job.error) if getattr(job, "error", None) else None
+            return state, None, error
+        
+        reports = []
+        for inline in job.dest.inlined_responses:
+            if inline.response is not None and inline.response.text:
+                reports.append(inline.response.text)
+            else:
+                reports.append(f"Ошибка генерации отчета: {inline.error}")
+        return state, reports, None
+    
+    
+    async def _run_blocking(self, description: str, fn, *args):
+        """
+        Run a blocking Gemini SDK call on AI_EXECUTOR within timeout_seconds
+        
+        Waiting for the process-wide RPM budget (gemini_limiter) does not count against the timeout.
+        
+        Raises:
+            TimeoutError: "<description> timed out after ..." (a TimeoutError, so callers
+                can still tell a timeout apart from an API failure)
+        """
+        await gemini_limiter.acquire()
+        try:
+            return await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(AI_EXECUTOR, fn, *args),
+                timeout=self.timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{description} timed out after {self.timeout_seconds} seconds") from None
+    
+    
     async def generate_report(
         self,
         context: AIAnalysisContext
@@ -200,40 +550,21 @@ class AIAgronomistService:
         start_time = time.time()
         
         try:
-            # Format context for LLM
-            context_json = self._format_context_for_prompt(context)
-            
-            # Build user prompt
-            user_prompt = f"""Проанализируй следующие данные спутникового анализа поля и создай детальный отчет:
-
-```json
-{context_json}
-```
-
-Следуй строго указанному формату Markdown из системного промпта."""
+            prompt = self._report_prompt(context)
             
             # Generate response with timeout
             logger.info("Generating AI report...")
             
-            # Run with timeout (Gemini SDK calls are synchronous, so we wrap in executor)
-            loop = asyncio.get_event_loop()
-            try:
-                response = await asyncio.wait_for(
-                    loop.run_in_executor(None, lambda: self.model.start_chat(history=[]).send_message(
-                        f"{SYSTEM_PROMPT_REPORT_GENERATION}\n\n{user_prompt}"
-                    )),
-                    timeout=self.timeout_seconds
-                )
-            except asyncio.TimeoutError:
-                raise Exception(f"AI report generation timed out after {self.timeout_seconds} seconds")
+            response = await self._run_blocking("AI report generation", self.model.generate_content, prompt)
             
             if not response or not response.text:
                 raise Exception("Empty response from Gemini API")
             
             generation_time = time.time() - start_time
-            logger.info(f"Report generated successfully in {generation_time:.2f}s")
+            logger.info("Report generated successfully in %.2fs", generation_time)
             
-            return AIReportResponse(
+            # Trusted values (SDK text, our own timing): model_construct skips re-validation
+            return AIReportResponse.model_construct(
                 status="success",
                 report_markdown=response.text,
                 generation_time_seconds=round(generation_time, 2),
@@ -245,20 +576,132 @@ class AIAgronomistService:
             error_msg = f"Failed to generate AI report: {str(e)}"
             logger.error(error_msg, exc_info=True)
             
-            # Determine error type
-            error_type = "api_error"
-            if "timeout" in str(e).lower():
-                error_type = "api_timeout"
-            elif "quota" in str(e).lower() or "rate" in str(e).lower():
-                error_type = "quota_exceeded"
+            # Chained, so classify_error can dispatch on the original Gemini error type
+            raise Exception(error_msg) from e
+    
+    
+    async def stream_report(
+        self,
+        context: AIAnalysisContext
+    ) -> AsyncIterator[str]:
+        """
+        Generate a report like generate_report, yielding Markdown chunks as Gemini produces them
+        
+        Args:
+            context: Complete field analysis context
+            
+        Yields:
+            Report text chunks
+            
+        Raises:
+            Exception: If generation fails or exceeds timeout_seconds overall
+        """
+        if not self.is_available():
+            raise Exception("AI service not available. Please check GEMINI_API_KEY configuration.")
+        
+        loop = asyncio.get_running_loop()
+        await gemini_limiter.acquire()
+        deadline = loop.time() + self.timeout_seconds
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(self._report_prompt(context), stream=True),
+                timeout=self.timeout_seconds
+            )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    break
+                if chunk.text:
+                    yield chunk.text
+        except asyncio.TimeoutError as e:
+            raise Exception(f"AI report generation timed out after {self.timeout_seconds} seconds") from e
+        except Exception as e:
+            logger.error("Failed to stream AI report: %s", e, exc_info=True)
+            raise Exception(f"Failed to generate AI report: {str(e)}") from e
+    
+    
+    async def generate_reports_batch(
+        self,
+        contexts: List[AIAnalysisContext]
+    ) -> AIReportBatchResponse:
+        """
+        Generate reports for several fields with a single Gemini call
+        
+        The contexts are marshalled into one prompt that asks for a JSON array of
+        Markdown reports in field order. If the answer cannot be parsed, the reports
+        are generated with parallel single calls instead.
+        
+        Args:
+            contexts: Field analysis contexts (the request schema caps their number)
+            
+        Returns:
+            AIReportBatchResponse with one report per context, in order
             
-            raise Exception(error_msg)
+        Raises:
+            Exception: If generation fails
+        """
+        if not self.is_available():
+            raise Exception("AI service not available. Please check GEMINI_API_KEY configuration.")
+        
+        start_time = time.time()
+        
+        fields_block = "\n\n".join(
+            f"ПОЛЕ {number}:\n```json\n{self._format_context_for_prompt(context)}\n```"
+            for number, context in enumerate(contexts, start=1)
+        )
+        user_prompt = f"""Проанализируй данные спутникового анализа для {len(contexts)} полей и создай детальный отчет для каждого поля.
+
+{fields_block}
+
+Каждый отчет следует строго указанному формату Markdown из системного промпта.
+Верни ТОЛЬКО JSON-массив из {len(contexts)} строк: Markdown-отчеты в порядке полей, без пояснений."""
+        
+        logger.info("Generating batch AI report for %d fields...", len(contexts))
+        
+        reports = None
+        try:
+            response = await self._run_blocking(
+                "AI report generation", self.model.generate_content, f"{SYSTEM_PROMPT_REPORT_GENERATION}\n\n{user_prompt}"
+            )
+            reports = _parse_batch_reports(response.text if response else "", len(contexts))
+            if reports is None:
+                logger.warning("Batch report response is not a JSON array of reports, falling back to single calls")
+        except TimeoutError:
+            raise
+        except Exception as e:
+            logger.warning("Batch report call failed, falling back to single calls: %s", e)
+        
+        if reports is None:
+            singles = await asyncio.gather(*(self.generate_report(context) for context in contexts))
+        else:
+            # A single call produced every report; each carries the shared generation time
+            elapsed = round(time.time() - start_time, 2)
+            singles = [
+                AIReportResponse.model_construct(
+                    status="success",
+                    report_markdown=report,
+                    generation_time_seconds=elapsed,
+                    model_used=self.model_name
+                )
+                for report in reports
+            ]
+        
+        generation_time = time.time() - start_time
+        logger.info("Batch of %d reports generated in %.2fs", len(contexts), generation_time)
+        
+        return AIReportBatchResponse.model_construct(
+            status="success",
+            reports=singles,
+            generation_time_seconds=round(generation_time, 2)
+        )
     
     
     async def chat(
         self,
         original_context: AIAnalysisContext,
-        chat_history: List[ChatMessage],
+        chat_history: List[Tuple[str, str]],
         new_question: str
     ) -> AIChatResponse:
         """
@@ -266,7 +709,7 @@ class AIAgronomistService:
         
         Args:
             original_context: Original field analysis context
-            chat_history: Previous chat messages
+            chat_history: Previous chat messages as (role, content) pairs
             new_question: New user question
             
         Returns:
@@ -284,56 +727,32 @@ class AIAgronomistService:
             # Format context for RAG
             context_json = self._format_context_for_prompt(original_context)
             
-            # Build conversation history for Gemini
-            gemini_history = []
-            
             # Add system context as first user message (with assistant acknowledgment)
-            context_intro = f"""[ANALYSIS_CONTEXT]
-```json
-{context_json}
-```
-
-Это контекст анализа поля. Все твои ответы должны основываться на этих данных."""
+            context_intro, context_key = _chat_context_intro(context_json)
             
-            # Convert chat history to Gemini format
-            for msg in chat_history:
-                if msg.role == "user":
-                    gemini_history.append({
-                        "role": "user",
-                        "parts": [msg.content]
-                    })
-                elif msg.role == "assistant":
-                    gemini_history.append({
-                        "role": "model",
-                        "parts": [msg.content]
-                    })
+            # Convert chat history to Gemini format (one dict lookup per message; the SDK
+            # accepts any sequence of parts, and a 1-tuple is cheaper than a list)
+            gemini_history = [
+                {"role": _GEMINI_ROLES[role], "parts": (content,)}
+                for role, content in chat_history
+                if role in _GEMINI_ROLES
+            ]
             
             # Create chat session
-            logger.info(f"Processing chat question: {new_question[:50]}...")
-            
-            # Build user message with context (only on first message)
-            if len(chat_history) == 0:
-                full_question = f"{SYSTEM_PROMPT_CHAT}\n\n{context_intro}\n\nВопрос пользователя: {new_question}"
-            else:
-                full_question = new_question
+            logger.info("Processing chat question: %.50s...", new_question)
             
-            # Use asyncio timeout wrapper for Gemini API calls
-            loop = asyncio.get_event_loop()
-            try:
-                response = await asyncio.wait_for(
-                    loop.run_in_executor(None, lambda: self.model.start_chat(history=gemini_history).send_message(full_question)),
-                    timeout=self.timeout_seconds
-                )
-            except asyncio.TimeoutError:
-                raise Exception(f"AI chat response timed out after {self.timeout_seconds} seconds")
+            response = await self._run_blocking(
+                "AI chat response", self._send_chat, context_intro, context_key, gemini_history, new_question
+            )
             
             if not response or not response.text:
                 raise Exception("Empty response from Gemini API")
             
             generation_time = time.time() - start_time
-            logger.info(f"Chat response generated in {generation_time:.2f}s")
+            logger.info("Chat response generated in %.2fs", generation_time)
             
-            return AIChatResponse(
+            # Trusted values (SDK text, our own timing): model_construct skips re-validation
+            return AIChatResponse.model_construct(
                 status="success",
                 answer=response.text,
                 generation_time_seconds=round(generation_time, 2),
@@ -345,7 +764,7 @@ class AIAgronomistService:
             error_msg = f"Failed to generate chat response: {str(e)}"
             logger.error(error_msg, exc_info=True)
             
-            raise Exception(error_msg)
+            raise Exception(error_msg) from e
 
 
 # ============================================================================
@@ -1,66 +1,97 @@
 """
 ML Forecast Service
-Service for time series forecasting of vegetation indices using Gradient Boosting
+Service for time series forecasting of vegetation indices using histogram-based Gradient Boosting
 """
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import GradientBoostingRegressor
+from scipy.interpolate import PchipInterpolator
+from sklearn.ensemble import HistGradientBoostingRegressor
+from functools import lru_cache
 import logging
 
 # Import schemas and utilities
 try:
     from api.forecast_schemas import ForecastRequest, ForecastResponse, ForecastDataPoint
-    from services.ml_utils import convert_to_dataframe, create_features
+    from services.ml_utils import convert_arrays_to_dataframe, build_feature_matrix, warm_up_feature_builder
 except ImportError:
     logging.warning("Не удалось выполнить импорты в ForecastService. Используются заглушки.")
     # Определяем заглушки, чтобы избежать ошибок импорта
     ForecastRequest = object
     ForecastResponse = object
     ForecastDataPoint = object
-    convert_to_dataframe = lambda x, y: pd.DataFrame()
-    create_features = lambda x: pd.DataFrame()
+    convert_arrays_to_dataframe = lambda x, y, z: pd.DataFrame()
+    build_feature_matrix = lambda x: np.empty((0, 4), dtype=np.float32)
+    warm_up_feature_builder = lambda: None
 
 
 logger = logging.getLogger(__name__)
 
 
+def _daily_mean(df_raw: pd.DataFrame, index_name: str) -> pd.DataFrame:
+    """
+    Среднее за каждый день от первого до последнего наблюдения (NaN в днях без данных),
+    как resample('D').mean(), но двумя np.bincount по номерам дней вместо GroupBy
+    """
+    days = df_raw.index.values.astype("datetime64[D]")
+    offsets = (days - days.min()).astype(np.int64)
+    sums = np.bincount(offsets, weights=df_raw[index_name].to_numpy(dtype=np.float64))
+    counts = np.bincount(offsets)
+    with np.errstate(invalid='ignore'):
+        means = sums / counts  # 0/0 = NaN для дней без наблюдений
+    daily_index = pd.date_range(days.min(), periods=counts.size, freq='D', name=df_raw.index.name)
+    return pd.DataFrame({index_name: means}, index=daily_index)
+
+
+def _day_numbers(index: pd.DatetimeIndex) -> np.ndarray:
+    """Номера дней (от 1970-01-01) как ось x для интерполяции"""
+    return index.values.astype("datetime64[D]").astype(np.float64)
+
+
 class ForecastService:
     """Сервис для прогнозирования временных рядов вегетационных индексов."""
     
     def __init__(self):
-        # Признаки, используемые моделью
-        self.FEATURES = ['dayofyear_sin', 'dayofyear_cos', 'weekofyear', 'month']
-        # Параметры модели (оптимизированы для баланса скорости и точности)
+        # Параметры модели (оптимизированы для баланса скорости и точности).
+        # early_stopping=False: обучаются все 400 итераций, без отложенной валидационной выборки
         self.MODEL_PARAMS = {
-            'n_estimators': 400,
+            'max_iter': 400,
             'learning_rate': 0.05,
             'max_depth': 5,
+            'early_stopping': False,
             'random_state': 42
         }
 
     def _initialize_model(self):
-        """Инициализирует модель Gradient Boosting."""
-        return GradientBoostingRegressor(**self.MODEL_PARAMS)
+        """
+        Инициализирует модель Gradient Boosting.
+        Гистограммный вариант: признаки разбиваются на uint8-корзины, и поиск разбиений
+        идет по гистограммам (параллельно через OpenMP), а не по отсортированным float-значениям.
+        """
+        return HistGradientBoostingRegressor(**self.MODEL_PARAMS)
 
     def _preprocess_and_label(self, df_raw: pd.DataFrame, index_name: str) -> pd.DataFrame:
         """
         Интерполирует временной ряд и маркирует точки как Historical или Interpolated.
         """
         # Ресемплинг до ежедневной частоты
-        df_daily = df_raw[[index_name]].resample('D').mean()
+        df_daily = _daily_mean(df_raw, index_name)
 
         # Маркировка типа данных
         df_daily['Type'] = np.where(df_daily[index_name].notna(), 'Historical', 'Interpolated')
             
-        # Полиномиальная интерполяция (order=2) с отказоустойчивостью.
+        # Монотонная кубическая интерполяция (PCHIP) с отказоустойчивостью: строится один раз
+        # по наблюдениям и вычисляется на всей дневной сетке; в отличие от полинома
+        # второго порядка не дает выбросов между наблюдениями.
         try:
-            # Проверяем, достаточно ли уникальных точек (> order+1) для полиномиальной интерполяции
-            if len(df_daily[index_name].dropna()) > 3:
-                df_interpolated = df_daily[index_name].interpolate(method='polynomial', order=2)
+            valid = df_daily[index_name].dropna()
+            # Проверяем, достаточно ли точек для сплайна
+            if len(valid) > 3:
+                interpolator = PchipInterpolator(_day_numbers(valid.index), valid.to_numpy(), extrapolate=False)
+                df_interpolated = pd.Series(interpolator(_day_numbers(df_daily.index)), index=df_daily.index)
             else:
-                raise ValueError("Недостаточно данных для полиномиальной интерполяции.")
+                raise ValueError("Недостаточно данных для сплайн-интерполяции.")
         except Exception as e:
-            logger.warning(f"Polynomial interpolation failed ({e}). Falling back to linear interpolation.")
+            logger.warning(f"PCHIP interpolation failed ({e}). Falling back to linear interpolation.")
             df_interpolated = df_daily[index_name].interpolate(method='linear')
         
         # Заполнение оставшихся NaN на краях (если интерполяция не покрыла начало/конец)
@@ -87,16 +118,16 @@ class ForecastService:
 
         # 1. Подготовка данных
         try:
-            df_raw = convert_to_dataframe(request.historical_data, index_name)
+            dates, values = request.as_arrays()
+            df_raw = convert_arrays_to_dataframe(dates, values, index_name)
             df_processed = self._preprocess_and_label(df_raw, index_name)
-            df_featured = create_features(df_processed)
+            X_train = build_feature_matrix(df_processed.index)
         except Exception as e:
             logger.error(f"Data preprocessing failed: {e}")
             # Выбрасываем ValueError для обработки на уровне API (HTTP 400)
             raise ValueError(f"Ошибка предобработки данных: {e}")
 
-        X_train = df_featured[self.FEATURES]
-        y_train = df_featured[index_name]
+        y_train = df_processed[index_name].to_numpy()
 
         # 2. Обучение модели
         model = self._initialize_model()
@@ -109,10 +140,7 @@ class ForecastService:
             periods=request.forecast_horizon_days,
             freq='D'
         )
-        
-        df_future = pd.DataFrame(index=future_dates)
-        df_future_featured = create_features(df_future)
-        X_future = df_future_featured[self.FEATURES]
+        X_future = build_feature_matrix(future_dates)
 
         # 4. Прогнозирование
         predictions = model.predict(X_future)
@@ -134,25 +162,39 @@ class ForecastService:
         if ForecastDataPoint is object or ForecastResponse is object:
             raise ImportError("Схемы данных (ForecastDataPoint/Response) не были импортированы корректно.")
 
-        forecast_points = []
-        for index, row in df_combined.iterrows():
-            forecast_points.append(
-                ForecastDataPoint(
-                    date=index.date(),  # Конвертируем обратно в date объект
-                    value=round(row[index_name], 4),  # Округление до 4 знаков
-                    type=row['Type']
-                )
-            )
+        # Столбцы извлекаются целиком (без Series на каждую строку, как в iterrows):
+        # даты - объекты date, значения - округленные до 4 знаков float
+        dates = df_combined.index.date
+        values = np.round(df_combined[index_name].to_numpy(), 4).tolist()
+        types = df_combined['Type'].to_numpy()
+        forecast_points = [
+            ForecastDataPoint(date=point_date, value=value, type=point_type)
+            for point_date, value, point_type in zip(dates, values, types)
+        ]
 
         return ForecastResponse(
             index_name=index_name,
             forecast=forecast_points,
-            metadata={"model_type": "GradientBoostingRegressor (Seasonal Features)"}
+            metadata={"model_type": "HistGradientBoostingRegressor (Seasonal Features)"}
         )
 
 
 # Функция для Dependency Injection в FastAPI
+@lru_cache(maxsize=1)
 def get_forecast_service() -> ForecastService:
-    """Возвращает экземпляр ForecastService для использования в FastAPI."""
+    """
+    Возвращает общий экземпляр ForecastService для использования в FastAPI.
+    Сервис не хранит состояния между запросами (модель создается на каждый вызов
+    generate_forecast), поэтому один экземпляр безопасно разделять между потоками.
+    """
     return ForecastService()
 
+
+
+def warm_up_forecast_service() -> None:
+    """
+    Выполняет разовую инициализацию, которая иначе пришлась бы на первый запрос:
+    компиляцию построителя признаков и создание общего экземпляра сервиса.
+    """
+    warm_up_feature_builder()
+    get_forecast_service()
@@ -17,17 +17,109 @@ except ImportError:
     
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
-from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.figure import Figure
+from matplotlib.colors import LinearSegmentedColormap, Normalize
 from pathlib import Path
 import logging
-from typing import Dict, Any, Tuple
+import threading
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 
 from api.schemas import Geometry, FieldStats
+from services.index_kernels import INDEX_BANDS, masked_index_stats, valid_scl_mask
 
 logger = logging.getLogger(__name__)
 
+# DPI of the index visualizations
+VISUALIZATION_DPI = 150
+
+
+def _divide_or_zero(numerator: np.ndarray, denominator: np.ndarray, clip: bool) -> np.ndarray:
+    """
+    numerator / denominator written into `numerator`, 0 where the denominator is 0,
+    optionally clipped to [-1, 1] in place
+
+    The division runs unmasked (its SIMD loop is faster than a where= division that
+    skips the few zero denominators), then copyto zeroes them through a where= mask
+    without the gather/scatter of boolean-index assignment
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(numerator, denominator, out=numerator)
+    np.copyto(numerator, 0, where=denominator == 0)
+    if clip:
+        np.clip(numerator, -1, 1, out=numerator)
+    return numerator
+
+
+def _normalized_difference(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    (A - B) / (A + B) in [-1, 1], 0 where A + B == 0
+
+    The bands are cast to float32 inside the ufuncs (no band copies), and the
+    division and clip reuse the numerator buffer: two float32 arrays in total
+    instead of a temporary per operation
+    """
+    numerator = np.subtract(a, b, dtype=np.float32)
+    denominator = np.add(a, b, dtype=np.float32)
+    return _divide_or_zero(numerator, denominator, clip=True)
+
+
+class _Renderer:
+    """
+    Persistent Figure/Axes/AxesImage reused across visualizations
+
+    Built without pyplot, so there is no global figure state. Not thread-safe:
+    each worker thread gets its own instance via _thread_renderer().
+    """
+
+    def __init__(self):
+        self.fig = Figure(figsize=(10, 10), dpi=VISUALIZATION_DPI)
+        self.ax = self.fig.subplots()
+        # Use nearest neighbor interpolation for pixel-perfect display when zoomed
+        self.im = self.ax.imshow(
+            np.zeros((2, 2), dtype=np.float32),
+            interpolation='nearest',  # Nearest for pixel-perfect display
+            aspect='equal',  # Maintain aspect ratio
+            origin='upper'  # Top-left origin (standard for images)
+        )
+        # Remove axes
+        self.ax.axis('off')
+
+    def render(self, data_array: np.ndarray, output_path: Path, cmap, norm) -> None:
+        """Draws data_array with the given colormap/norm and saves it as a transparent PNG"""
+        data_height, data_width = data_array.shape
+        # Figure size matches the data array size (at least 10 inches)
+        self.fig.set_size_inches(
+            max(10, data_width / VISUALIZATION_DPI),
+            max(10, data_height / VISUALIZATION_DPI)
+        )
+        self.im.set_data(np.ma.masked_invalid(data_array))
+        self.im.set_cmap(cmap)
+        self.im.set_norm(norm)
+        # Same extent imshow computes for a fresh image of this shape; updates the axes limits too
+        self.im.set_extent((-0.5, data_width - 0.5, data_height - 0.5, -0.5))
+        # Always use transparent to preserve alpha channel (masked areas are handled via cmap.set_bad())
+        self.fig.savefig(
+            output_path,
+            bbox_inches='tight',
+            pad_inches=0,
+            dpi=VISUALIZATION_DPI,
+            transparent=True,
+            facecolor='none',
+            edgecolor='none'
+        )
+
+
+_renderers = threading.local()
+
+
+def _thread_renderer() -> _Renderer:
+    """Renderer owned by the calling thread (created on first use)"""
+    renderer = getattr(_renderers, "renderer", None)
+    if renderer is None:
+        renderer = _renderers.renderer = _Renderer()
+    return renderer
+
 
 class GeoProcessor:
     """Processes geospatial data and calculates NDVI"""
@@ -89,6 +181,16 @@ class GeoProcessor:
         
         # Backwards compatibility
         self.ndvi_colormap = self.colormaps['NDVI']
+        
+        # Render colormaps per index, prepared once: transparent masked areas for normal
+        # images, light gray for images with very few valid pixels
+        self._render_colormaps = {}
+        for name, base_cmap in self.colormaps.items():
+            normal_cmap = base_cmap.copy()
+            normal_cmap.set_bad((0.0, 0.0, 0.0, 0.0))  # Fully transparent
+            low_valid_cmap = base_cmap.copy()
+            low_valid_cmap.set_bad((0.95, 0.95, 0.95, 0.3))  # Light gray, semi-transparent
+            self._render_colormaps[name] = (normal_cmap, low_valid_cmap)
     
     def calculate_ndvi(
         self, 
@@ -107,28 +209,7 @@ class GeoProcessor:
         Returns:
             NDVI array with values between -1 and 1
         """
-        # Convert to float32 for precision
-        red = red.astype('float32')
-        nir = nir.astype('float32')
-        
-        # Suppress division warnings
-        np.seterr(divide='ignore', invalid='ignore')
-        
-        # Calculate NDVI
-        numerator = nir - red
-        denominator = nir + red
-        
-        # Handle division by zero
-        ndvi = np.where(
-            denominator != 0,
-            numerator / denominator,
-            0
-        )
-        
-        # Clip values to valid range [-1, 1]
-        ndvi = np.clip(ndvi, -1, 1)
-        
-        return ndvi
+        return _normalized_difference(nir, red)
     
     def calculate_evi(
         self,
@@ -149,22 +230,17 @@ class GeoProcessor:
         Returns:
             EVI array
         """
-        red = red.astype('float32')
-        nir = nir.astype('float32')
-        blue = blue.astype('float32')
-        
-        np.seterr(divide='ignore', invalid='ignore')
+        # Two float32 buffers: the 7.5*BLUE term is staged in the numerator buffer
+        denominator = np.multiply(red, 6, dtype=np.float32)
+        np.add(denominator, nir, out=denominator, dtype=np.float32)
+        numerator = np.multiply(blue, 7.5, dtype=np.float32)
+        np.subtract(denominator, numerator, out=denominator)
+        np.add(denominator, 1, out=denominator)
         
-        numerator = nir - red
-        denominator = nir + 6*red - 7.5*blue + 1
+        np.subtract(nir, red, out=numerator, dtype=np.float32)
+        np.multiply(numerator, 2.5, out=numerator)
         
-        evi = np.where(
-            denominator != 0,
-            2.5 * numerator / denominator,
-            0
-        )
-        
-        return np.clip(evi, -1, 1)
+        return _divide_or_zero(numerator, denominator, clip=True)
     
     def calculate_psri(
         self,
@@ -185,19 +261,8 @@ class GeoProcessor:
         Returns:
             PSRI array
         """
-        red = red.astype('float32')
-        green = green.astype('float32')
-        nir = nir.astype('float32')
-        
-        np.seterr(divide='ignore', invalid='ignore')
-        
-        psri = np.where(
-            nir != 0,
-            (red - green) / nir,
-            0
-        )
-        
-        return psri
+        numerator = np.subtract(red, green, dtype=np.float32)
+        return _divide_or_zero(numerator, nir.astype('float32', copy=False), clip=False)
     
     def calculate_nbr(
         self,
@@ -216,21 +281,7 @@ class GeoProcessor:
         Returns:
             NBR array
         """
-        nir = nir.astype('float32')
-        swir2 = swir2.astype('float32')
-        
-        np.seterr(divide='ignore', invalid='ignore')
-        
-        numerator = nir - swir2
-        denominator = nir + swir2
-        
-        nbr = np.where(
-            denominator != 0,
-            numerator / denominator,
-            0
-        )
-        
-        return np.clip(nbr, -1, 1)
+        return _normalized_difference(nir, swir2)
     
     def calculate_ndsi(
         self,
@@ -249,21 +300,69 @@ class GeoProcessor:
         Returns:
             NDSI array
         """
-        green = green.astype('float32')
-        swir1 = swir1.astype('float32')
+        return _normalized_difference(green, swir1)
+    
+    def resample_scl(self, scl: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+        """
+        Resize Scene Classification Layer to the band shape (nearest neighbor)
         
-        np.seterr(divide='ignore', invalid='ignore')
+        Each output pixel takes the SCL pixel under its centre, gathered with one
+        index lookup; for the usual integer factor (20 m SCL, 10 m bands) this
+        repeats every SCL pixel factor x factor times
         
-        numerator = green - swir1
-        denominator = green + swir1
+        Args:
+            scl: Scene Classification Layer
+            shape: Target (height, width)
+            
+        Returns:
+            SCL array with the requested shape
+        """
+        if scl.shape == shape:
+            return scl
+        height, width = shape
+        rows = (2 * np.arange(height) + 1) * scl.shape[0] // (2 * height)
+        cols = (2 * np.arange(width) + 1) * scl.shape[1] // (2 * width)
+        return scl[np.ix_(rows, cols)]
+    
+    def valid_pixel_mask(self, scl: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+        """
+        Cloud-free pixel mask for a scene, computed once and shared by all its indices
         
-        ndsi = np.where(
-            denominator != 0,
-            numerator / denominator,
-            0
-        )
+        Args:
+            scl: Scene Classification Layer
+            shape: Band shape (height, width)
+            
+        Returns:
+            Boolean array, True for valid pixels
+        """
+        return valid_scl_mask(self.resample_scl(scl, shape))
+    
+    def masked_index(
+        self,
+        index_name: str,
+        bands: Dict[str, np.ndarray],
+        scl: Optional[np.ndarray] = None,
+        valid_mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, Optional[Dict[str, float]]]:
+        """
+        Calculate index, apply cloud mask and compute statistics in one fused pass
         
-        return np.clip(ndsi, -1, 1)
+        Args:
+            index_name: NDVI, EVI, PSRI, NBR or NDSI
+            bands: Band arrays by name (e.g. Sentinel data dict)
+            scl: Scene Classification Layer (resized to the band shape if needed)
+            valid_mask: Mask from valid_pixel_mask, used instead of scl
+            
+        Returns:
+            Masked index array (NaN for clouds/invalid pixels) and
+            statistics dict (mean, min, max, std_dev) or None if no valid pixels
+        """
+        if index_name not in INDEX_BANDS:
+            raise ValueError(f"Unsupported index: {index_name}")
+        if valid_mask is not None:
+            return masked_index_stats(index_name, bands, valid_mask=valid_mask)
+        reference_band = bands[INDEX_BANDS[index_name][1][0]]
+        return masked_index_stats(index_name, bands, self.resample_scl(scl, reference_band.shape))
     
     def apply_cloud_mask(
         self,
@@ -295,25 +394,54 @@ class GeoProcessor:
             Masked array with NaN for clouds and invalid pixels
         """
         # Resize SCL to match data array if needed
-        if scl.shape != data_array.shape:
-            from scipy.ndimage import zoom
-            zoom_factors = (
-                data_array.shape[0] / scl.shape[0],
-                data_array.shape[1] / scl.shape[1]
-            )
-            scl = zoom(scl, zoom_factors, order=0)  # Nearest neighbor
+        scl = self.resample_scl(scl, data_array.shape)
         
-        # Create mask for invalid/cloud pixels
         # Valid SCL codes: 4 (Vegetation), 5 (Not vegetated), 6 (Water), 7 (Unclassified), 11 (Snow/ice)
-        # Mask everything else: 0, 1, 2, 3, 8, 9, 10
-        invalid_mask = ~np.isin(scl, [4, 5, 6, 7, 11])
+        # Mask everything else: 0, 1, 2, 3, 8, 9, 10 (one LUT gather for integer SCL)
+        valid_mask = valid_scl_mask(scl)
         
         # Apply mask
-        masked_data = data_array.copy()
-        masked_data[invalid_mask] = np.nan
+        masked_data = np.where(valid_mask, data_array, np.nan)
         
         return masked_data
     
+    def field_area_ha(self, geometry: Geometry) -> float:
+        """Approximate field area in hectares (for better precision, use projected CRS)"""
+        geom = shape(geometry.dict())
+        return geom.area * 111320 * 111320 / 10000  # Very rough approximation
+    
+    def field_bounds(self, geometry: Geometry) -> list:
+        """Field bounds as [[minLat, minLon], [maxLat, maxLon]]"""
+        geom = shape(geometry.dict())
+        return [
+            [geom.bounds[1], geom.bounds[0]],  # [minLat, minLon]
+            [geom.bounds[3], geom.bounds[2]]   # [maxLat, maxLon]
+        ]
+    
+    def no_valid_data_stats(self, geometry: Geometry, capture_date: str) -> FieldStats:
+        """
+        Statistics for a fully clouded scene (no valid pixels), without any raster work
+        
+        Args:
+            geometry: Field geometry
+            capture_date: Date of satellite capture
+            
+        Returns:
+            Field statistics with 100% cloud coverage
+        """
+        return FieldStats(
+            area_ha=round(self.field_area_ha(geometry), 2),
+            mean_ndvi=0.0,
+            capture_date=capture_date,
+            cloud_coverage_percent=100.0,
+            zones_percent={
+                "low (<0.3)": 0.0,
+                "medium (0.3-0.6)": 0.0,
+                "high (>0.6)": 0.0
+            },
+            valid_pixels_percent=0.0
+        )
+    
     def calculate_statistics(
         self,
         ndvi: np.ndarray,
@@ -332,27 +460,33 @@ class GeoProcessor:
             Field statistics
         """
         # Calculate area in hectares
-        geom = shape(geometry.dict())
-        # Approximate area calculation (for better precision, use projected CRS)
-        area_ha = geom.area * 111320 * 111320 / 10000  # Very rough approximation
+        area_ha = self.field_area_ha(geometry)
         
-        # Filter out NaN values
-        valid_ndvi = ndvi[~np.isnan(ndvi)]
+        # Valid (non-NaN) pixels as a boolean mask: the reductions below skip NaN
+        # themselves, so the valid values are never copied into a compacted array
+        valid_mask = ~np.isnan(ndvi)
         total_pixels = ndvi.size
-        valid_pixels = valid_ndvi.size
+        valid_pixels = int(np.count_nonzero(valid_mask))
         
-        # Calculate mean NDVI
-        mean_ndvi = float(np.mean(valid_ndvi)) if valid_pixels > 0 else 0.0
+        # Calculate mean NDVI (float64 accumulation, masked in place)
+        if valid_pixels > 0:
+            mean_ndvi = float(np.sum(ndvi, where=valid_mask, dtype=np.float64)) / valid_pixels
+        else:
+            mean_ndvi = 0.0
         
         # Calculate cloud coverage
         cloud_coverage_percent = ((total_pixels - valid_pixels) / total_pixels * 100) if total_pixels > 0 else 0.0
         valid_pixels_percent = 100.0 - cloud_coverage_percent
         
-        # Calculate NDVI zones distribution
+        # Calculate NDVI zones distribution: two cumulative counts (< 0.3, < 0.6)
+        # give all three zones, the medium and high ones by difference.
+        # NaN compares False, so cloud pixels fall out of the counts without a mask
         if valid_pixels > 0:
-            low_zone = np.sum(valid_ndvi < 0.3) / valid_pixels * 100
-            medium_zone = np.sum((valid_ndvi >= 0.3) & (valid_ndvi < 0.6)) / valid_pixels * 100
-            high_zone = np.sum(valid_ndvi >= 0.6) / valid_pixels * 100
+            below_low = np.count_nonzero(ndvi < 0.3)
+            below_high = np.count_nonzero(ndvi < 0.6)
+            low_zone = below_low / valid_pixels * 100
+            medium_zone = (below_high - below_low) / valid_pixels * 100
+            high_zone = (valid_pixels - below_high) / valid_pixels * 100
         else:
             low_zone = medium_zone = high_zone = 0.0
         
@@ -375,7 +509,8 @@ class GeoProcessor:
         nir_band: np.ndarray,
         scl_band: np.ndarray,
         geometry: Geometry,
-        output_dir: Path
+        output_dir: Path,
+        valid_mask: Optional[np.ndarray] = None
     ) -> Dict[str, Any]:
         """
         Process field data: calculate NDVI, apply cloud mask, calculate statistics
@@ -386,15 +521,18 @@ class GeoProcessor:
             scl_band: Scene Classification Layer
             geometry: Field geometry
             output_dir: Output directory for results
+            valid_mask: Precomputed valid_pixel_mask (skips the SCL lookup)
             
         Returns:
             Dictionary with NDVI array, statistics, and bounds
         """
-        logger.info("Calculating NDVI...")
-        ndvi = self.calculate_ndvi(red_band, nir_band)
-        
-        logger.info("Applying cloud mask...")
-        ndvi_masked = self.apply_cloud_mask(ndvi, scl_band)
+        logger.info("Calculating NDVI with cloud mask...")
+        ndvi_masked, _ = self.masked_index(
+            "NDVI",
+            {"red": red_band, "nir": nir_band},
+            scl_band,
+            valid_mask=valid_mask
+        )
         
         logger.info("Calculating statistics...")
         stats = self.calculate_statistics(
@@ -404,11 +542,7 @@ class GeoProcessor:
         )
         
         # Calculate bounds from geometry
-        geom = shape(geometry.dict())
-        bounds = [
-            [geom.bounds[1], geom.bounds[0]],  # [minLat, minLon]
-            [geom.bounds[3], geom.bounds[2]]   # [maxLat, maxLon]
-        ]
+        bounds = self.field_bounds(geometry)
         
         return {
             "ndvi": ndvi_masked,
@@ -443,47 +577,32 @@ class GeoProcessor:
         """
         output_path = output_dir / filename
         
-        # Get the appropriate colormap
-        base_cmap = self.colormaps.get(index_name, self.ndvi_colormap)
-        cmap = base_cmap.copy()
-        
-        # Calculate valid pixels percentage
-        valid_pixels = np.sum(~np.isnan(data_array))
+        # Calculate valid pixels percentage (the mask is computed once and reused below)
+        valid_mask = ~np.isnan(data_array)
+        valid_pixels = np.count_nonzero(valid_mask)
         total_pixels = data_array.size
         valid_percent = 100 * valid_pixels / total_pixels if total_pixels > 0 else 0
         
-        try:
-            # For very low valid pixels (< 5%), show masked areas as light gray instead of transparent
-            # This ensures the image frame and valid pixels are visible
-            if valid_percent < 5.0:
-                # Light gray for masked areas - visible but not distracting
-                cmap.set_bad((0.95, 0.95, 0.95, 0.3))  # Light gray, semi-transparent
-                logger.info(f"Low valid pixels ({valid_percent:.2f}%) - using light gray for masked areas")
-            else:
-                # Normal case - transparent for masked areas
-                cmap.set_bad((0.0, 0.0, 0.0, 0.0))  # Fully transparent
-        except Exception:
-            pass
-        
-        # Create figure with higher DPI for better pixel visibility
-        # Match the actual data array size
-        data_height, data_width = data_array.shape
-        fig_dpi = 150
-        fig_width = max(10, data_width / fig_dpi)
-        fig_height = max(10, data_height / fig_dpi)
-        fig, ax = plt.subplots(figsize=(fig_width, fig_height), dpi=fig_dpi)
-        
-        # Plot index with colormap (mask invalid values)
-        # Use better normalization for visualization
-        from matplotlib.colors import Normalize
+        # Get the appropriate colormap (unknown indices use the NDVI colormap)
+        normal_cmap, low_valid_cmap = self._render_colormaps.get(
+            index_name, self._render_colormaps['NDVI']
+        )
+        # For very low valid pixels (< 5%), show masked areas as light gray instead of transparent
+        # This ensures the image frame and valid pixels are visible
+        if valid_percent < 5.0:
+            cmap = low_valid_cmap
+            logger.info(f"Low valid pixels ({valid_percent:.2f}%) - using light gray for masked areas")
+        else:
+            cmap = normal_cmap
         
         # Filter out NaN and extreme values
-        valid_data = data_array[~np.isnan(data_array)]
-        if len(valid_data) > 0:
+        if valid_pixels > 0:
+            valid_data = data_array[valid_mask]
             # Use data-driven normalization for better contrast
             # Use wider percentiles for better visibility of all pixels
-            data_min = np.percentile(valid_data, 1)  # 1st percentile
-            data_max = np.percentile(valid_data, 99)  # 99th percentile
+            # 1st/99th percentile in one pass. np.percentile already selects with np.partition
+            # (no full sort); valid_data is a scratch copy, so it is partitioned in place
+            data_min, data_max = np.percentile(valid_data, [1, 99], overwrite_input=True)
             # But respect the index range and ensure some margin
             vmin_used = max(vmin, data_min * 0.95)  # Slightly extend range for visibility
             vmax_used = min(vmax, data_max * 1.05)  # Slightly extend range for visibility
@@ -498,53 +617,13 @@ class GeoProcessor:
         
         norm = Normalize(vmin=vmin_used, vmax=vmax_used, clip=True)
         
-        # Use nearest neighbor interpolation for pixel-perfect display when zoomed
-        # This ensures individual pixels are visible
-        # Use imshow with extent to ensure proper georeferencing
-        # Calculate extent from bounds if available
-        im = ax.imshow(
-            np.ma.masked_invalid(data_array),
-            cmap=cmap,
-            norm=norm,
-            interpolation='nearest',  # Nearest for pixel-perfect display
-            aspect='equal',  # Maintain aspect ratio
-            origin='upper'  # Top-left origin (standard for images)
-        )
-        
         # Log visualization stats
-        valid_for_viz = ~np.isnan(data_array)
-        valid_count = np.sum(valid_for_viz)
-        logger.info(f"Visualization: {valid_count}/{data_array.size} pixels valid ({100*valid_count/data_array.size:.2f}%)")
-        
-        # Remove axes
-        ax.axis('off')
-        
-        # Save figure without colorbar (for map overlay)
-        # CRITICAL: If image is mostly transparent, use white background for masked areas
-        # instead of fully transparent - this ensures image is visible on map
-        valid_pixels = np.sum(~np.isnan(data_array))
-        total_pixels = data_array.size
-        valid_percent = 100 * valid_pixels / total_pixels
+        logger.info(f"Visualization: {valid_pixels}/{total_pixels} pixels valid ({valid_percent:.2f}%)")
         
-        # Always use transparent to preserve alpha channel
-        # Masked areas are handled via cmap.set_bad()
-        facecolor = 'none'
-        transparent = True
-        
-        plt.savefig(
-            output_path,
-            bbox_inches='tight',
-            pad_inches=0,
-            dpi=fig_dpi,
-            transparent=transparent,
-            facecolor=facecolor,
-            edgecolor='none'
-        )
-        plt.close()
+        # Save figure without colorbar (for map overlay), reusing this thread's figure
+        _thread_renderer().render(data_array, output_path, cmap, norm)
         
         # Log image stats for debugging
-        valid_pixels = np.sum(~np.isnan(data_array))
-        total_pixels = data_array.size
         logger.info(f"Visualization saved to {output_path} - Valid pixels: {valid_pixels}/{total_pixels} ({100*valid_pixels/total_pixels:.1f}%)")
         return filename
 
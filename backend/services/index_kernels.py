@@ -0,0 +1,276 @@
+"""
+Fused vegetation index kernels
+Index calculation, SCL cloud mask and statistics in a single pass over the raster
+"""
+import numpy as np
+import logging
+from typing import Dict, Optional, Tuple
+
+# Numba is optional: without it the same pipeline runs as vectorized NumPy
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+# Valid SCL classes: 4 (Vegetation), 5 (Not vegetated), 6 (Water), 7 (Unclassified), 11 (Snow/ice)
+# Everything else (no data, defective, dark, shadows, clouds, cirrus) is masked
+VALID_SCL_CLASSES = (4, 5, 6, 7, 11)
+VALID_SCL_LUT = np.zeros(256, dtype=np.uint8)
+VALID_SCL_LUT[list(VALID_SCL_CLASSES)] = 1
+
+# LUT for a precomputed validity mask passed to the kernel as uint8 (1 = valid)
+_MASK_LUT = np.zeros(256, dtype=np.uint8)
+_MASK_LUT[1] = 1
+
+# Index codes and the bands each kernel reads as (a, b, c)
+INDEX_NDVI, INDEX_EVI, INDEX_PSRI, INDEX_NBR, INDEX_NDSI = 0, 1, 2, 3, 4
+INDEX_BANDS = {
+    "NDVI": (INDEX_NDVI, ("nir", "red", None)),
+    "EVI": (INDEX_EVI, ("nir", "red", "blue")),
+    "PSRI": (INDEX_PSRI, ("red", "green", "nir")),
+    "NBR": (INDEX_NBR, ("nir", "swir2", None)),
+    "NDSI": (INDEX_NDSI, ("green", "swir1", None)),
+}
+
+# Pixels per row block in the NumPy fallback (~256x256 tile: 256 KB per float32 temporary)
+NUMPY_BLOCK_PIXELS = 256 * 256
+
+# float32 constants keep the arithmetic in float32, matching GeoProcessor.calculate_*
+_F0 = np.float32(0.0)
+_F1 = np.float32(1.0)
+_FM1 = np.float32(-1.0)
+_F2_5 = np.float32(2.5)
+_F6 = np.float32(6.0)
+_F7_5 = np.float32(7.5)
+
+
+def _pixel_value(code, a, b, c):
+    """Index value for one pixel (same formulas as GeoProcessor.calculate_*)"""
+    if code == INDEX_PSRI:
+        # PSRI = (RED - GREEN) / NIR, not clipped
+        if c != _F0:
+            return (a - b) / c
+        return _F0
+    if code == INDEX_EVI:
+        # EVI = 2.5 * (NIR - RED) / (NIR + 6*RED - 7.5*BLUE + 1)
+        denominator = a + _F6 * b - _F7_5 * c + _F1
+        value = _F2_5 * (a - b) / denominator if denominator != _F0 else _F0
+    else:
+        # NDVI / NBR / NDSI: normalized difference (A - B) / (A + B)
+        denominator = a + b
+        value = (a - b) / denominator if denominator != _F0 else _F0
+    # Clip to [-1, 1]; NaN stays NaN like np.clip
+    if value < _FM1:
+        return _FM1
+    if value > _F1:
+        return _F1
+    return value
+
+
+def _masked_index_rows(code, a, b, c, scl, lut, out, row_n, row_mean, row_m2, row_min, row_max):
+    """
+    Fills `out` with the masked index (NaN for invalid pixels) and per-row
+    count/mean/M2/min/max using Welford's online update
+    """
+    height, width = out.shape
+    for i in range(height):
+        n = 0
+        mean = 0.0
+        m2 = 0.0
+        mn = np.inf
+        mx = -np.inf
+        for j in range(width):
+            s = scl[i, j]
+            if s < 0 or s > 255 or lut[s] == 0:
+                out[i, j] = np.nan
+                continue
+            # Bands may be uint16 DN or float32: the cast happens per pixel, not as an array copy
+            value = _pixel_value(code, np.float32(a[i, j]), np.float32(b[i, j]), np.float32(c[i, j]))
+            out[i, j] = value
+            if value != value:  # NaN from the input bands
+                continue
+            v = float(value)
+            n += 1
+            delta = v - mean
+            mean += delta / n
+            m2 += delta * (v - mean)
+            if v < mn:
+                mn = v
+            if v > mx:
+                mx = v
+        row_n[i] = n
+        row_mean[i] = mean
+        row_m2[i] = m2
+        row_min[i] = mn
+        row_max[i] = mx
+
+
+if NUMBA_AVAILABLE:
+    # No fastmath: it would change NaN handling and float32 rounding vs. the NumPy path.
+    # nogil instead of parallel=True: analyze_field already runs indices concurrently on a
+    # thread pool, and Numba's default workqueue layer must not be entered from several threads
+    _pixel_value = njit(cache=True, inline="always")(_pixel_value)
+    _masked_index_rows = njit(cache=True, nogil=True)(_masked_index_rows)
+
+
+# Band dtypes the Numba kernel reads directly (Sentinel-2 DN are uint16)
+_KERNEL_BAND_DTYPES = (np.dtype(np.uint16), np.dtype(np.int16), np.dtype(np.float32))
+
+
+def _band_array(band: np.ndarray) -> np.ndarray:
+    """Band as a C-contiguous array the kernel can read, copying only when necessary"""
+    if band.dtype in _KERNEL_BAND_DTYPES:
+        return np.ascontiguousarray(band)
+    return np.ascontiguousarray(band, dtype=np.float32)
+
+
+def _merge_row_stats(row_n, row_mean, row_m2, row_min, row_max) -> Optional[Dict[str, float]]:
+    """Combines per-row Welford partials (Chan et al.) into mean/min/max/std_dev"""
+    present = row_n > 0
+    if not present.any():
+        return None
+    n_rows = row_n[present].astype(np.float64)
+    means = row_mean[present]
+    total = n_rows.sum()
+    mean = float(np.dot(n_rows, means) / total)
+    m2 = float(row_m2[present].sum() + np.dot(n_rows, (means - mean) ** 2))
+    return {
+        "mean": mean,
+        "min": float(row_min[present].min()),
+        "max": float(row_max[present].max()),
+        "std_dev": float(np.sqrt(m2 / total))
+    }
+
+
+def _numpy_index(code: int, a: np.ndarray, b: np.ndarray, c: Optional[np.ndarray]) -> np.ndarray:
+    """Vectorized index calculation used when Numba is not installed"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if code == INDEX_PSRI:
+            return np.where(c != 0, (a - b) / c, _F0)
+        if code == INDEX_EVI:
+            denominator = a + _F6 * b - _F7_5 * c + _F1
+            value = np.where(denominator != 0, _F2_5 * (a - b) / denominator, _F0)
+        else:
+            denominator = a + b
+            value = np.where(denominator != 0, (a - b) / denominator, _F0)
+    return np.clip(value, -1, 1)
+
+
+def valid_scl_mask(scl: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of valid (cloud-free) pixels for a Scene Classification Layer
+
+    Integer SCL is a single gather through VALID_SCL_LUT; float SCL (e.g. read
+    through PIL) keeps the exact comparison against the valid classes
+    """
+    if scl.dtype == np.uint8:
+        return VALID_SCL_LUT.view(np.bool_)[scl]
+    if np.issubdtype(scl.dtype, np.integer):
+        return VALID_SCL_LUT.view(np.bool_)[np.clip(scl, 0, 255)]
+    return np.isin(scl, VALID_SCL_CLASSES)
+
+
+def _numpy_block_stats(
+    code: int,
+    a: np.ndarray,
+    b: np.ndarray,
+    c: Optional[np.ndarray],
+    valid_mask: np.ndarray,
+    out: np.ndarray
+) -> Tuple[int, float, float, float, float]:
+    """Masked index for one row block written into `out`; returns count/mean/M2/min/max"""
+    a, b = a.astype(np.float32, copy=False), b.astype(np.float32, copy=False)
+    if c is not None:
+        c = c.astype(np.float32, copy=False)
+    out[...] = _numpy_index(code, a, b, c)
+    out[~valid_mask] = np.nan
+    # The block is cache-sized, so compacting its valid pixels is cheap and keeps the
+    # reductions on fast contiguous paths; mean/M2 accumulate in float64 like the Numba kernel
+    values = out[~np.isnan(out)]
+    n = values.size
+    if n == 0:
+        return 0, 0.0, 0.0, np.inf, -np.inf
+    return (
+        n,
+        np.mean(values, dtype=np.float64),
+        np.var(values, dtype=np.float64) * n,
+        values.min(),
+        values.max()
+    )
+
+
+def masked_index_stats(
+    index_name: str,
+    bands: Dict[str, np.ndarray],
+    scl: Optional[np.ndarray] = None,
+    valid_mask: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, Optional[Dict[str, float]]]:
+    """
+    Calculate a vegetation index, apply the SCL cloud mask and compute statistics
+
+    Args:
+        index_name: NDVI, EVI, PSRI, NBR or NDSI
+        bands: Band arrays by name (red, nir, blue, green, swir1, swir2), uint16 DN or float32
+        scl: Scene Classification Layer, already resampled to the band shape
+        valid_mask: Precomputed valid_scl_mask(scl), used instead of scl so that
+            several indices of one scene share a single mask
+
+    Returns:
+        (masked float32 index array with NaN for invalid pixels,
+         {"mean", "min", "max", "std_dev"} or None if no valid pixels)
+
+    Raises:
+        ValueError: If the index is not supported or neither scl nor valid_mask is given
+    """
+    if index_name not in INDEX_BANDS:
+        raise ValueError(f"Unsupported index: {index_name}")
+    if (scl is None) == (valid_mask is None):
+        raise ValueError("Exactly one of scl or valid_mask is required")
+    code, band_names = INDEX_BANDS[index_name]
+    a, b, c = (_band_array(bands[name]) if name else None for name in band_names)
+    mask_source = scl if valid_mask is None else valid_mask
+    if mask_source.shape != a.shape:
+        raise ValueError(f"Mask shape {mask_source.shape} does not match band shape {a.shape}")
+
+    if NUMBA_AVAILABLE:
+        # SCL codes go through the LUT as integers; NaN/out-of-range codes become -1 (masked).
+        # A precomputed mask is read as uint8 0/1 through the identity LUT
+        if valid_mask is not None:
+            scl_codes, lut = np.ascontiguousarray(valid_mask, dtype=np.bool_).view(np.uint8), _MASK_LUT
+        elif np.issubdtype(scl.dtype, np.integer):
+            scl_codes, lut = np.ascontiguousarray(scl), VALID_SCL_LUT
+        else:
+            scl_codes, lut = np.where(np.isfinite(scl), scl, -1).astype(np.int32), VALID_SCL_LUT
+        height = a.shape[0]
+        out = np.empty(a.shape, dtype=np.float32)
+        row_n = np.zeros(height, dtype=np.int64)
+        row_mean = np.zeros(height, dtype=np.float64)
+        row_m2 = np.zeros(height, dtype=np.float64)
+        row_min = np.zeros(height, dtype=np.float64)
+        row_max = np.zeros(height, dtype=np.float64)
+        _masked_index_rows(
+            code, a, b, a if c is None else c, scl_codes, lut,
+            out, row_n, row_mean, row_m2, row_min, row_max
+        )
+        return out, _merge_row_stats(row_n, row_mean, row_m2, row_min, row_max)
+
+    # NumPy path: every step (band cast, arithmetic, mask, reductions) is a separate pass,
+    # so the raster is processed in row blocks whose temporaries stay cache-resident
+    if valid_mask is None:
+        valid_mask = valid_scl_mask(scl)
+    height, width = a.shape
+    block_rows = max(1, NUMPY_BLOCK_PIXELS // max(width, 1))
+    out = np.empty(a.shape, dtype=np.float32)
+    starts = range(0, height, block_rows)
+    partials = np.zeros((5, len(starts)), dtype=np.float64)
+    for k, r0 in enumerate(starts):
+        r1 = min(r0 + block_rows, height)
+        partials[:, k] = _numpy_block_stats(
+            code, a[r0:r1], b[r0:r1], None if c is None else c[r0:r1], valid_mask[r0:r1], out[r0:r1]
+        )
+    block_n, block_mean, block_m2, block_min, block_max = partials
+    return out, _merge_row_stats(block_n, block_mean, block_m2, block_min, block_max)
@@ -4,69 +4,111 @@ Functions for data preprocessing and feature engineering
 """
 import pandas as pd
 import numpy as np
-from typing import List
 import logging
 
-# Import HistoricalDataPoint from forecast_schemas
+# Numba опционален: без него используется векторизованная реализация на NumPy
 try:
-    from api.forecast_schemas import HistoricalDataPoint
+    from numba import njit
+    NUMBA_AVAILABLE = True
 except ImportError:
-    logging.warning("Не удалось импортировать HistoricalDataPoint в ml_utils. Используется заглушка Pydantic.")
-    from pydantic import BaseModel
-    
-    class HistoricalDataPoint(BaseModel):
-        date: object 
-        value: float
-
+    NUMBA_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Порядок столбцов матрицы признаков, которую возвращает build_feature_matrix
+FEATURE_COLUMNS = ['dayofyear_sin', 'dayofyear_cos', 'weekofyear', 'month']
+
+# Циклические признаки зависят только от дня года (1-366): sin/cos считаются один раз
+# при импорте, дальше - выборка по индексу dayofyear (элемент 0 не используется).
+# Используем 365.25 для учета високосных лет.
+_DAYOFYEAR_ANGLE = 2 * np.pi * np.arange(367) / 365.25
+_DAYOFYEAR_SIN = np.sin(_DAYOFYEAR_ANGLE)
+_DAYOFYEAR_COS = np.cos(_DAYOFYEAR_ANGLE)
+
 
-def convert_to_dataframe(data: List[HistoricalDataPoint], index_name: str) -> pd.DataFrame:
-    """Конвертирует список Pydantic моделей в Pandas DataFrame."""
-    if not data:
+def convert_arrays_to_dataframe(dates: np.ndarray, values: np.ndarray, index_name: str) -> pd.DataFrame:
+    """
+    Конвертирует параллельные массивы (datetime64[D], float) в Pandas DataFrame.
+    """
+    if dates.size == 0:
         return pd.DataFrame(columns=[index_name])
 
-    # Обработка совместимости Pydantic V1 (.dict()) и V2 (.model_dump())
-    if hasattr(data[0], 'model_dump'):
-        data_list = [item.model_dump() for item in data]
-    else:
-        data_list = [item.dict() for item in data]
-
-    df = pd.DataFrame(data_list)
-    
-    # Конвертируем date объекты в datetime для работы с временным рядом
-    df['date'] = pd.to_datetime(df['date'])
-    # Устанавливаем индекс и сортируем
-    df = df.set_index('date').sort_index()
-    df = df.rename(columns={'value': index_name})
-    
+    # Конвертируем даты в datetime индекс для работы с временным рядом и сортируем
+    df = pd.DataFrame(
+        {index_name: values},
+        index=pd.DatetimeIndex(dates.astype("datetime64[ns]"), name="date")
+    ).sort_index()
+
     # Удаляем дубликаты (если есть), оставляя среднее значение
     if not df.index.is_unique:
         df = df.groupby(df.index).mean()
-        
+
     return df
 
 
-def create_features(df: pd.DataFrame) -> pd.DataFrame:
+def _build_features_loop(
+    doy: np.ndarray, week: np.ndarray, month: np.ndarray, doy_sin: np.ndarray, doy_cos: np.ndarray
+) -> np.ndarray:
+    """Поэлементное заполнение матрицы признаков (компилируется Numba, если доступна)."""
+    n = doy.shape[0]
+    out = np.empty((n, 4), dtype=np.float32)
+    for i in range(n):
+        out[i, 0] = doy_sin[doy[i]]
+        out[i, 1] = doy_cos[doy[i]]
+        out[i, 2] = week[i]
+        out[i, 3] = month[i]
+    return out
+
+
+def _build_features_numpy(
+    doy: np.ndarray, week: np.ndarray, month: np.ndarray, doy_sin: np.ndarray, doy_cos: np.ndarray
+) -> np.ndarray:
+    """Векторизованный вариант _build_features_loop для окружений без Numba."""
+    out = np.empty((doy.shape[0], 4), dtype=np.float32)
+    out[:, 0] = doy_sin[doy]
+    out[:, 1] = doy_cos[doy]
+    out[:, 2] = week
+    out[:, 3] = month
+    return out
+
+
+if NUMBA_AVAILABLE:
+    # cache=True сохраняет скомпилированный код на диск, чтобы не перекомпилировать при каждом старте
+    _build_features = njit(cache=True)(_build_features_loop)
+else:
+    _build_features = _build_features_numpy
+
+
+def _calendar_fields(index: pd.DatetimeIndex):
     """
-    Создает временные признаки (циклические) для захвата сезонности.
+    День года, номер недели ISO и месяц (int32) арифметикой над datetime64[D].
+    Заменяет index.isocalendar() (строит DataFrame из трех столбцов) и аксессоры pandas.
     """
-    df = df.copy()
-    df['dayofyear'] = df.index.dayofyear
-    
-    # Обработка weekofyear для совместимости с разными версиями Pandas
-    try:
-        df['weekofyear'] = df.index.isocalendar().week.astype(int)
-    except AttributeError:
-        # Fallback для старых версий Pandas (deprecated)
-        df['weekofyear'] = df.index.week
-        
-    df['month'] = df.index.month
-
-    # Циклические признаки (Sin/Cos Transformation)
-    # Используем 365.25 для учета високосных лет.
-    df['dayofyear_sin'] = np.sin(2 * np.pi * df['dayofyear']/365.25)
-    df['dayofyear_cos'] = np.cos(2 * np.pi * df['dayofyear']/365.25)
-    return df
+    days = index.values.astype("datetime64[D]")
+    years = days.astype("datetime64[Y]")
+    doy = (days - years.astype("datetime64[D]")).astype(np.int64) + 1
+    month = (days.astype("datetime64[M]") - years.astype("datetime64[M]")).astype(np.int64) + 1
 
+    # Неделя ISO - номер недели ее четверга в году этого четверга (1970-01-01 - четверг)
+    day_numbers = days.astype(np.int64)
+    thursdays = day_numbers - (day_numbers + 3) % 7 + 3
+    thursday_years = thursdays.astype("datetime64[D]").astype("datetime64[Y]").astype("datetime64[D]")
+    week = (thursdays - thursday_years.astype(np.int64)) // 7 + 1
+    return doy.astype(np.int32), week.astype(np.int32), month.astype(np.int32)
+
+
+def build_feature_matrix(index: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Строит матрицу признаков float32 (столбцы FEATURE_COLUMNS) напрямую из DatetimeIndex,
+    без промежуточного DataFrame.
+    """
+    doy, week, month = _calendar_fields(index)
+    return _build_features(doy, week, month, _DAYOFYEAR_SIN, _DAYOFYEAR_COS)
+
+
+def warm_up_feature_builder() -> None:
+    """
+    Прогрев построителя признаков: с Numba компилирует (или загружает из кэша) ядро,
+    чтобы первый запрос прогноза не платил за JIT-компиляцию.
+    """
+    build_feature_matrix(pd.date_range("2024-01-01", periods=2, freq="D"))
@@ -0,0 +1,73 @@
+"""
+Rate limiting
+In-process token buckets for the AI endpoints (single event loop, no locking needed)
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TokenBucket:
+    """Token bucket: `rate` tokens per `period` seconds, bursts of up to `rate`"""
+
+    def __init__(self, rate: int, period: float):
+        self.capacity = float(rate)
+        self.fill_rate = rate / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """
+        Take one token if available
+
+        Returns:
+            0.0 if a token was taken, otherwise seconds until one becomes available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.fill_rate
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it (bursts queue instead of failing)"""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0.0:
+                return
+            await asyncio.sleep(wait)
+
+
+class KeyedRateLimiter:
+    """One TokenBucket per key (e.g. user id), least recently used keys evicted"""
+
+    def __init__(self, rate: int, period: float, max_keys: int = 10000):
+        self.rate = rate
+        self.period = period
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+
+    def try_acquire(self, key: Hashable) -> float:
+        """TokenBucket.try_acquire for the bucket of `key`"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.period)
+            # An evicted key starts again with a full bucket, which only errs on the lenient side
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.try_acquire()
+
+
+# Per-user AI requests (reports, chat): over the limit the API answers 429
+AI_USER_RATE_PER_MINUTE = int(os.getenv("AI_USER_RATE_PER_MINUTE", "10"))
+ai_user_limiter = KeyedRateLimiter(AI_USER_RATE_PER_MINUTE, 60.0)
+
+# All Gemini calls of this process, kept under the API key's RPM quota: calls wait instead of failing
+GEMINI_RATE_PER_MINUTE = int(os.getenv("GEMINI_RATE_PER_MINUTE", "400"))
+gemini_limiter = TokenBucket(GEMINI_RATE_PER_MINUTE, 60.0)
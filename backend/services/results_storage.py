@@ -0,0 +1,85 @@
+"""
+Results storage
+Hot (tmpfs) / cold (durable) directories for analysis artifacts
+"""
+import os
+import shutil
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Durable results directory (served at /results)
+RESULTS_COLD = Path("results")
+
+# Optional fast directory for in-progress artifacts, e.g. /dev/shm/results.
+# When set, analyses are written here and copied to RESULTS_COLD in the background
+_hot_env = os.getenv("RESULTS_HOT")
+RESULTS_HOT: Optional[Path] = Path(_hot_env) if _hot_env else None
+
+# Size cap of RESULTS_HOT; least recently written analyses are evicted beyond it
+RESULTS_HOT_MAX_BYTES = int(os.getenv("RESULTS_HOT_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def result_directories() -> List[Path]:
+    """Directories to look up results in, hot first"""
+    if RESULTS_HOT is not None:
+        return [RESULTS_HOT, RESULTS_COLD]
+    return [RESULTS_COLD]
+
+
+def analysis_write_dir(analysis_id: str) -> Path:
+    """Directory new artifacts of an analysis are written to (not created here)"""
+    return (RESULTS_HOT or RESULTS_COLD) / analysis_id
+
+
+def find_result_path(relative_path: str) -> Optional[Path]:
+    """
+    Resolve a path relative to the results root, checking hot then cold storage
+
+    Returns:
+        Resolved existing path, or None if missing or outside the results directories
+    """
+    for root in result_directories():
+        root = root.resolve()
+        candidate = (root / relative_path).resolve()
+        if candidate.is_relative_to(root) and candidate.exists():
+            return candidate
+    return None
+
+
+def persist_analysis(analysis_id: str) -> None:
+    """
+    Copy an analysis from hot to cold storage, then enforce the hot size cap.
+    Runs as a background task after the response has been sent.
+    """
+    if RESULTS_HOT is None:
+        return
+    source = RESULTS_HOT / analysis_id
+    try:
+        shutil.copytree(source, RESULTS_COLD / analysis_id, dirs_exist_ok=True)
+    except Exception as e:
+        logger.error(f"Failed to persist analysis {analysis_id}: {e}")
+        return
+    _evict_hot()
+
+
+def _evict_hot() -> None:
+    """Remove the oldest persisted analyses from hot storage while it exceeds the cap"""
+    entries = []
+    total = 0
+    for entry in RESULTS_HOT.iterdir():
+        if not entry.is_dir():
+            continue
+        size = sum(f.stat().st_size for f in entry.rglob("*") if f.is_file())
+        entries.append((entry.stat().st_mtime, size, entry))
+        total += size
+
+    for _, size, entry in sorted(entries):
+        if total <= RESULTS_HOT_MAX_BYTES:
+            break
+        # Only evict analyses that already have a durable copy
+        if (RESULTS_COLD / entry.name).exists():
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
@@ -2,20 +2,26 @@
 Sentinel Hub API integration service
 Fetches Sentinel-2 data
 """
+import asyncio
 import os
 import numpy as np
 from typing import Dict, Optional, List
 import logging
 from datetime import datetime, timedelta
 import requests
+from requests.adapters import HTTPAdapter
 from shapely.geometry import shape
 import base64
 import json
 
 from api.schemas import Geometry
+from services.index_kernels import valid_scl_mask
 
 logger = logging.getLogger(__name__)
 
+# Max pooled keep-alive connections to Sentinel Hub (time series fetches run concurrently)
+SENTINEL_POOL_SIZE = 32
+
 
 class SentinelService:
     """
@@ -35,6 +41,11 @@ class SentinelService:
         # Use mock mode if credentials are not provided
         self.use_mock = not all([self.client_id, self.client_secret])
         
+        # One pooled session for all API calls: TCP/TLS connections are kept alive
+        # and reused instead of a new handshake per request
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=SENTINEL_POOL_SIZE))
+        
         if self.use_mock:
             logger.warning(
                 "Sentinel Hub credentials not found. Using MOCK mode. "
@@ -45,6 +56,10 @@ class SentinelService:
             self.api_url = "https://services.sentinel-hub.com"
             self.access_token = None
     
+    def close(self) -> None:
+        """Close pooled HTTP connections"""
+        self.session.close()
+    
     def _get_access_token(self) -> str:
         """
         Get OAuth2 access token from Sentinel Hub
@@ -62,7 +77,7 @@ class SentinelService:
             "client_secret": self.client_secret
         }
         
-        response = requests.post(url, data=data)
+        response = self.session.post(url, data=data)
         response.raise_for_status()
         
         self.access_token = response.json()["access_token"]
@@ -155,7 +170,7 @@ class SentinelService:
             
             url = f"{self.api_url}/api/v1/process"
             def _perform_request(payload):
-                resp = requests.post(url, json=payload, headers=headers, timeout=60)
+                resp = self.session.post(url, json=payload, headers=headers, timeout=60)
                 
                 # Log response details
                 logger.info(f"API Response: status={resp.status_code}, content-type={resp.headers.get('content-type')}, size={len(resp.content)} bytes")
@@ -241,7 +256,7 @@ class SentinelService:
             # Valid SCL codes for Sentinel-2 L2A: 4 (Vegetation), 5 (Not vegetated), 6 (Water), 7 (Unclassified), 11 (Snow/ice)
             unique, counts = np.unique(scl, return_counts=True)
             hist = dict(zip(unique.astype(int).tolist(), counts.astype(int).tolist()))
-            valid = np.isin(scl, [4, 5, 6, 7, 11])
+            valid = valid_scl_mask(scl)
             valid_fraction = float(valid.sum()) / float(scl.size) if scl.size else 0.0
             logger.info(f"Date range {date_range[0]} to {date_range[1]}: SCL histogram: {hist}; valid_fraction={valid_fraction:.3f}")
 
@@ -259,7 +274,7 @@ class SentinelService:
                     b02, b03, b04, b08, b11, b12, scl = _perform_request(retry_payload)
                     unique, counts = np.unique(scl, return_counts=True)
                     hist = dict(zip(unique.astype(int).tolist(), counts.astype(int).tolist()))
-                    valid = np.isin(scl, [4, 5, 6, 7, 11])
+                    valid = valid_scl_mask(scl)
                     valid_fraction = float(valid.sum()) / float(scl.size) if scl.size else 0.0
                     logger.info(f"Retry result: SCL histogram: {hist}; valid_fraction={valid_fraction:.3f}")
                 except Exception as retry_err:
@@ -267,13 +282,13 @@ class SentinelService:
                     # Continue with original data even if retry fails
 
             return {
-                "blue": b02.astype("float32"),
-                "green": b03.astype("float32"),
-                "red": b04.astype("float32"),
-                "nir": b08.astype("float32"),
-                "swir1": b11.astype("float32"),
-                "swir2": b12.astype("float32"),
-                "scl": scl.astype("uint8")
+                "blue": b02.astype("float32", copy=False),
+                "green": b03.astype("float32", copy=False),
+                "red": b04.astype("float32", copy=False),
+                "nir": b08.astype("float32", copy=False),
+                "swir1": b11.astype("float32", copy=False),
+                "swir2": b12.astype("float32", copy=False),
+                "scl": scl.astype("uint8", copy=False)
             }
             
         except Exception as e:
@@ -437,12 +452,18 @@ class SentinelService:
             logger.error("Sentinel Hub credentials not configured. MOCK mode is disabled. Please configure credentials.")
             raise ValueError("Sentinel Hub credentials required. Please configure SENTINEL_CLIENT_ID and SENTINEL_CLIENT_SECRET in backend/config.py")
         
-        # Fetch real data
-        real_data = self._fetch_real_data(geometry, date_range)
+        # Fetch real data (blocking HTTP + GeoTIFF decode) in a worker thread so that
+        # concurrent fetches do not block the event loop
+        real_data = await asyncio.to_thread(self._fetch_real_data, geometry, date_range)
         if not real_data:
             logger.error("Failed to fetch real Sentinel-2 data")
             raise ValueError("No Sentinel-2 data available for the specified area and date range")
         
+        # The band arrays are shared without copying by the analysis worker threads and
+        # the time series fetch cache: freeze them so no consumer can modify them in place
+        for band in real_data.values():
+            band.setflags(write=False)
+        
         return real_data
 
 
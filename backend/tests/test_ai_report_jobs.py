@@ -0,0 +1,149 @@
+"""
+Tests for asynchronous AI report jobs (Gemini Batch API) with a stubbed google-genai client
+"""
+import types
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from main import app
+from api import routes
+from api.ai_schemas import _AI_CONTEXT_EXAMPLE
+from auth.utils import get_current_user
+from database import Base, get_db
+from services import ai_agronomist
+from services.ai_agronomist import ai_agronomist_service
+
+
+class StubBatches:
+    """client.batches of google-genai: records submitted jobs, reports a settable state"""
+
+    def __init__(self):
+        self.created = []
+        self.state = "JOB_STATE_PENDING"
+        self.texts = []
+
+    def create(self, model, src, config):
+        self.created.append({"model": model, "src": src, "config": config})
+        return types.SimpleNamespace(name=f"batches/{len(self.created)}")
+
+    def get(self, name):
+        responses = [
+            types.SimpleNamespace(response=types.SimpleNamespace(text=text), error=None)
+            for text in self.texts
+        ]
+        return types.SimpleNamespace(
+            name=name,
+            state=types.SimpleNamespace(name=self.state),
+            error=None,
+            dest=types.SimpleNamespace(inlined_responses=responses)
+        )
+
+
+class User:
+    id = 7
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    stub = StubBatches()
+    monkeypatch.setattr(ai_agronomist, "BATCH_API_AVAILABLE", True)
+    monkeypatch.setattr(ai_agronomist_service, "api_key", "test-key")
+    monkeypatch.setattr(ai_agronomist_service, "_genai_client", types.SimpleNamespace(batches=stub))
+    return stub
+
+
+@pytest.fixture
+def client():
+    # One in-memory database shared by the request and DB executor threads
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = TestingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: User()
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_current_user, None)
+    engine.dispose()
+
+
+class TestAIReportJobs:
+    """POST /analysis/ai_report/async and GET /analysis/ai_report/job/{job_id}"""
+
+    def submit(self, client, count=2):
+        return client.post(
+            "/api/v1/analysis/ai_report/async",
+            json={"contexts": [_AI_CONTEXT_EXAMPLE] * count}
+        )
+
+    def test_submit_creates_batch(self, client, batches):
+        """One inline request per context is submitted and a poll URL returned"""
+        response = self.submit(client)
+
+        assert response.status_code == 202
+        data = response.json()
+        assert data["status"] == "pending"
+        assert data["poll_url"] == f"/api/v1/analysis/ai_report/job/{data['job_id']}"
+        assert len(batches.created) == 1
+        assert len(batches.created[0]["src"]) == 2
+
+    def test_poll_throttled(self, client, batches):
+        """A pending job is refreshed from Gemini at most every REPORT_JOB_POLL_SECONDS"""
+        job_url = self.submit(client).json()["poll_url"]
+
+        batches.state = "JOB_STATE_RUNNING"
+        assert client.get(job_url).json()["status"] == "running"
+
+        batches.state = "JOB_STATE_SUCCEEDED"
+        batches.texts = ["# Report 1", "# Report 2"]
+        assert client.get(job_url).json()["status"] == "running"
+
+    def test_succeeded_reports(self, client, batches, monkeypatch):
+        """A succeeded job returns one report per context"""
+        monkeypatch.setattr(routes, "REPORT_JOB_POLL_SECONDS", 0)
+        job_url = self.submit(client).json()["poll_url"]
+
+        batches.state = "JOB_STATE_SUCCEEDED"
+        batches.texts = ["# Report 1", "# Report 2"]
+        data = client.get(job_url).json()
+
+        assert data["status"] == "succeeded"
+        assert [r["report_markdown"] for r in data["reports"]] == ["# Report 1", "# Report 2"]
+
+    def test_failed_job(self, client, batches, monkeypatch):
+        """Terminal failure states map to failed"""
+        monkeypatch.setattr(routes, "REPORT_JOB_POLL_SECONDS", 0)
+        job_url = self.submit(client).json()["poll_url"]
+
+        batches.state = "JOB_STATE_EXPIRED"
+        data = client.get(job_url).json()
+
+        assert data["status"] == "failed"
+        assert data["reports"] is None
+
+    def test_other_users_job_not_found(self, client, batches):
+        """Jobs are only visible to their owner"""
+        job_url = self.submit(client).json()["poll_url"]
+
+        class OtherUser:
+            id = 8
+
+        app.dependency_overrides[get_current_user] = lambda: OtherUser()
+        assert client.get(job_url).status_code == 404
+
+    def test_unavailable_without_sdk(self, client, monkeypatch):
+        """Without google-genai the endpoint answers 503"""
+        monkeypatch.setattr(ai_agronomist, "BATCH_API_AVAILABLE", False)
+
+        assert self.submit(client).status_code == 503
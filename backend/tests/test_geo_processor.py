@@ -4,6 +4,19 @@ Unit tests for GeoProcessor
 import pytest
 import numpy as np
 from services.geo_processor import GeoProcessor
+from api.schemas import Geometry
+
+
+FIELD_GEOMETRY = Geometry(
+    type="Polygon",
+    coordinates=[[
+        [37.6173, 55.7558],
+        [37.6273, 55.7558],
+        [37.6273, 55.7458],
+        [37.6173, 55.7458],
+        [37.6173, 55.7558]
+    ]]
+)
 
 
 class TestGeoProcessor:
@@ -97,6 +110,63 @@ class TestGeoProcessor:
         assert np.all(ndvi >= -1)
         assert np.all(ndvi <= 1)
 
+    def test_statistics_with_cloud_pixels(self):
+        """Test zone percentages are computed over valid (non-NaN) pixels only"""
+        ndvi = np.array([
+            [0.1, 0.2, 0.4, np.nan],
+            [0.5, 0.7, 0.8, np.nan],
+            [0.9, np.nan, 0.3, 0.6]
+        ], dtype='float32')
+
+        stats = self.processor.calculate_statistics(ndvi, FIELD_GEOMETRY, "2023-10-01")
+
+        # 9 of 12 pixels are valid: 2 low, 3 medium (0.3 and 0.6 boundaries included), 4 high
+        assert stats.zones_percent["low (<0.3)"] == round(2 / 9 * 100, 1)
+        assert stats.zones_percent["medium (0.3-0.6)"] == round(3 / 9 * 100, 1)
+        assert stats.zones_percent["high (>0.6)"] == round(4 / 9 * 100, 1)
+        assert stats.cloud_coverage_percent == 25.0
+        assert stats.valid_pixels_percent == 75.0
+        assert stats.mean_ndvi == round(float(np.nanmean(ndvi.astype(np.float64))), 3)
+
+    def test_statistics_all_nan(self):
+        """Test a fully clouded raster gives zero mean and empty zones"""
+        ndvi = np.full((5, 5), np.nan, dtype='float32')
+
+        stats = self.processor.calculate_statistics(ndvi, FIELD_GEOMETRY, "2023-10-01")
+
+        assert stats.mean_ndvi == 0.0
+        assert stats.cloud_coverage_percent == 100.0
+        assert stats.valid_pixels_percent == 0.0
+        assert all(value == 0.0 for value in stats.zones_percent.values())
+
+    def test_resample_scl_integer_factor(self):
+        """Test 20 m SCL upsampled 2x repeats every pixel 2 x 2 times"""
+        scl = np.arange(12, dtype='uint8').reshape(3, 4)
+
+        resampled = self.processor.resample_scl(scl, (6, 8))
+
+        expected = np.repeat(np.repeat(scl, 2, axis=0), 2, axis=1)
+        assert np.array_equal(resampled, expected)
+        assert resampled.dtype == scl.dtype
+
+    def test_resample_scl_non_integer_factor(self):
+        """Test non-integer factors take the SCL pixel under each output pixel centre"""
+        scl = np.arange(35, dtype='uint8').reshape(5, 7)
+
+        for shape in [(8, 11), (3, 4), (7, 7)]:
+            resampled = self.processor.resample_scl(scl, shape)
+
+            rows = np.floor((np.arange(shape[0]) + 0.5) * scl.shape[0] / shape[0]).astype(int)
+            cols = np.floor((np.arange(shape[1]) + 0.5) * scl.shape[1] / shape[1]).astype(int)
+            assert resampled.shape == shape
+            assert np.array_equal(resampled, scl[rows][:, cols])
+
+    def test_resample_scl_same_shape(self):
+        """Test SCL already at the band shape is returned unchanged"""
+        scl = np.ones((4, 4), dtype='uint8')
+
+        assert self.processor.resample_scl(scl, (4, 4)) is scl
+
 
 class TestNDVIFormula:
     """Test NDVI formula correctness"""
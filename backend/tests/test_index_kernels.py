@@ -0,0 +1,142 @@
+"""
+Unit tests for the fused index kernels (services/index_kernels.py)
+"""
+import pytest
+import numpy as np
+from services import index_kernels
+from services.geo_processor import GeoProcessor
+from services.index_kernels import masked_index_stats, valid_scl_mask
+
+
+INDEX_NAMES = ["NDVI", "EVI", "PSRI", "NBR", "NDSI"]
+
+
+def make_scene(height=40, width=30, seed=0):
+    """Random uint16 bands with a mix of valid and cloudy SCL classes"""
+    rng = np.random.default_rng(seed)
+    bands = {
+        name: rng.integers(0, 10000, size=(height, width), dtype=np.uint16)
+        for name in ("red", "nir", "blue", "green", "swir1", "swir2")
+    }
+    # Zero pixels exercise the zero-denominator branches
+    bands["nir"][0, :5] = 0
+    bands["red"][0, :5] = 0
+    scl = rng.integers(0, 12, size=(height, width)).astype(np.uint8)
+    return bands, scl
+
+
+def reference_index(processor, index_name, bands, scl):
+    """GeoProcessor.calculate_* followed by apply_cloud_mask"""
+    b = {name: band.astype(np.float32) for name, band in bands.items()}
+    if index_name == "NDVI":
+        data = processor.calculate_ndvi(b["red"], b["nir"])
+    elif index_name == "EVI":
+        data = processor.calculate_evi(b["red"], b["nir"], b["blue"])
+    elif index_name == "PSRI":
+        data = processor.calculate_psri(b["red"], b["green"], b["nir"])
+    elif index_name == "NBR":
+        data = processor.calculate_nbr(b["nir"], b["swir2"])
+    else:
+        data = processor.calculate_ndsi(b["green"], b["swir1"])
+    return processor.apply_cloud_mask(data, scl)
+
+
+class TestMaskedIndexStats:
+    """masked_index_stats must match the GeoProcessor reference pipeline"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.processor = GeoProcessor()
+        self.bands, self.scl = make_scene()
+
+    @pytest.mark.parametrize("index_name", INDEX_NAMES)
+    def test_matches_reference(self, index_name):
+        """Masked array and statistics match calculate_* + apply_cloud_mask"""
+        out, stats = masked_index_stats(index_name, self.bands, scl=self.scl)
+        expected = reference_index(self.processor, index_name, self.bands, self.scl)
+
+        assert out.dtype == np.float32
+        assert out.shape == expected.shape
+        np.testing.assert_array_equal(np.isnan(out), np.isnan(expected))
+        np.testing.assert_allclose(out, expected, rtol=1e-6, atol=1e-6, equal_nan=True)
+
+        assert stats is not None
+        assert stats["mean"] == pytest.approx(float(np.nanmean(expected)), rel=1e-5, abs=1e-6)
+        assert stats["std_dev"] == pytest.approx(float(np.nanstd(expected)), rel=1e-5, abs=1e-6)
+        assert stats["min"] == pytest.approx(float(np.nanmin(expected)), rel=1e-6, abs=1e-6)
+        assert stats["max"] == pytest.approx(float(np.nanmax(expected)), rel=1e-6, abs=1e-6)
+
+    @pytest.mark.parametrize("index_name", INDEX_NAMES)
+    def test_valid_mask_variant(self, index_name):
+        """A precomputed valid_mask gives the same result as passing scl"""
+        out_scl, stats_scl = masked_index_stats(index_name, self.bands, scl=self.scl)
+        out_mask, stats_mask = masked_index_stats(
+            index_name, self.bands, valid_mask=valid_scl_mask(self.scl)
+        )
+
+        np.testing.assert_array_equal(out_mask, out_scl)
+        assert stats_mask == pytest.approx(stats_scl)
+
+    def test_row_blocks_merge(self, monkeypatch):
+        """Statistics merged over several row blocks match a single block"""
+        _, stats_single = masked_index_stats("NDVI", self.bands, scl=self.scl)
+        monkeypatch.setattr(index_kernels, "NUMPY_BLOCK_PIXELS", 7 * self.scl.shape[1])
+        _, stats_blocks = masked_index_stats("NDVI", self.bands, scl=self.scl)
+
+        assert stats_blocks == pytest.approx(stats_single)
+
+    def test_float_scl(self):
+        """Float SCL (e.g. read through PIL) is masked like integer SCL"""
+        out_int, _ = masked_index_stats("NDVI", self.bands, scl=self.scl)
+        out_float, _ = masked_index_stats("NDVI", self.bands, scl=self.scl.astype(np.float32))
+
+        np.testing.assert_array_equal(out_float, out_int)
+
+    def test_no_valid_pixels(self):
+        """A fully clouded scene returns an all-NaN array and no statistics"""
+        cloudy = np.full(self.scl.shape, 9, dtype=np.uint8)
+        out, stats = masked_index_stats("NDVI", self.bands, scl=cloudy)
+
+        assert stats is None
+        assert np.all(np.isnan(out))
+
+    def test_no_valid_pixels_with_mask(self):
+        """An all-False valid_mask returns no statistics"""
+        mask = np.zeros(self.scl.shape, dtype=bool)
+        _, stats = masked_index_stats("EVI", self.bands, valid_mask=mask)
+
+        assert stats is None
+
+    def test_both_scl_and_mask(self):
+        """Passing both scl and valid_mask is rejected"""
+        with pytest.raises(ValueError):
+            masked_index_stats(
+                "NDVI", self.bands, scl=self.scl, valid_mask=valid_scl_mask(self.scl)
+            )
+
+    def test_neither_scl_nor_mask(self):
+        """Passing neither scl nor valid_mask is rejected"""
+        with pytest.raises(ValueError):
+            masked_index_stats("NDVI", self.bands)
+
+    def test_unsupported_index(self):
+        """Unknown index names are rejected"""
+        with pytest.raises(ValueError):
+            masked_index_stats("SAVI", self.bands, scl=self.scl)
+
+    def test_mask_shape_mismatch(self):
+        """The mask must have the band shape"""
+        with pytest.raises(ValueError):
+            masked_index_stats("NDVI", self.bands, scl=self.scl[:-1])
+
+
+class TestValidSclMask:
+    """valid_scl_mask keeps classes 4, 5, 6, 7 and 11"""
+
+    @pytest.mark.parametrize("dtype", [np.uint8, np.int32, np.float32])
+    def test_valid_classes(self, dtype):
+        """All SCL codes map to the expected validity for every dtype"""
+        scl = np.arange(12).astype(dtype).reshape(3, 4)
+        expected = np.isin(np.arange(12), [4, 5, 6, 7, 11]).reshape(3, 4)
+
+        np.testing.assert_array_equal(valid_scl_mask(scl), expected)
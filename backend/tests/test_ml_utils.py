@@ -0,0 +1,75 @@
+"""
+Unit tests for forecast feature engineering (services/ml_utils.py)
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from services import ml_utils
+from services.ml_utils import FEATURE_COLUMNS, build_feature_matrix, convert_arrays_to_dataframe
+
+
+def pandas_features(index: pd.DatetimeIndex) -> pd.DataFrame:
+    """Reference features from the pandas datetime accessors"""
+    angle = 2 * np.pi * index.dayofyear.to_numpy() / 365.25
+    return pd.DataFrame({
+        'dayofyear_sin': np.sin(angle),
+        'dayofyear_cos': np.cos(angle),
+        'weekofyear': index.isocalendar().week.astype(int).to_numpy(),
+        'month': index.month.to_numpy(),
+    }, index=index)[FEATURE_COLUMNS]
+
+
+class TestBuildFeatureMatrix:
+    """build_feature_matrix must match the pandas reference"""
+
+    @pytest.mark.parametrize("index", [
+        # Several years including leap years, ISO week 53 and week 1 starting in December
+        pd.date_range("2015-06-23", "2025-03-01", freq="D"),
+        pd.DatetimeIndex(["2020-12-31", "2021-01-01", "2021-01-03", "2021-01-04", "2024-12-30"]),
+    ])
+    def test_matches_pandas(self, index):
+        """Columns FEATURE_COLUMNS equal the pandas accessors (float32)"""
+        features = build_feature_matrix(index)
+        expected = pandas_features(index).to_numpy(dtype=np.float32)
+
+        assert features.dtype == np.float32
+        assert features.shape == (len(index), len(FEATURE_COLUMNS))
+        np.testing.assert_array_equal(features, expected)
+
+    def test_numpy_kernel_matches_loop(self):
+        """The NumPy fallback equals the element-wise kernel"""
+        index = pd.date_range("2023-01-01", periods=500, freq="D")
+        fields = ml_utils._calendar_fields(index)
+        tables = (ml_utils._DAYOFYEAR_SIN, ml_utils._DAYOFYEAR_COS)
+
+        np.testing.assert_array_equal(
+            ml_utils._build_features_numpy(*fields, *tables),
+            ml_utils._build_features_loop(*fields, *tables)
+        )
+
+    def test_empty_index(self):
+        """An empty index gives an empty matrix with all columns"""
+        features = build_feature_matrix(pd.DatetimeIndex([]))
+
+        assert features.shape == (0, len(FEATURE_COLUMNS))
+
+
+class TestConvertArraysToDataframe:
+    """convert_arrays_to_dataframe builds a sorted daily series"""
+
+    def test_sorted_and_duplicates_averaged(self):
+        """Dates are sorted and duplicate dates averaged"""
+        dates = np.array(["2024-01-03", "2024-01-01", "2024-01-03"], dtype="datetime64[D]")
+        values = np.array([0.4, 0.2, 0.6])
+
+        df = convert_arrays_to_dataframe(dates, values, "NDVI")
+
+        assert list(df.index.strftime("%Y-%m-%d")) == ["2024-01-01", "2024-01-03"]
+        assert df["NDVI"].tolist() == pytest.approx([0.2, 0.5])
+
+    def test_empty(self):
+        """No dates give an empty frame with the index column"""
+        df = convert_arrays_to_dataframe(np.array([], dtype="datetime64[D]"), np.array([]), "NDVI")
+
+        assert df.empty
+        assert list(df.columns) == ["NDVI"]
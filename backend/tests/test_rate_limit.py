@@ -0,0 +1,115 @@
+"""
+Unit tests for the AI rate limiting (services/rate_limit.py)
+"""
+import types
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from api import routes
+from api.ai_schemas import _AI_CONTEXT_EXAMPLE
+from auth.utils import get_current_user
+from services import rate_limit
+from services.rate_limit import TokenBucket, KeyedRateLimiter
+
+
+class FakeClock:
+    """Replacement for time.monotonic that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    # Only the rate_limit module sees the fake clock; the event loop keeps the real one
+    monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=fake))
+    return fake
+
+
+class TestTokenBucket:
+    """Test cases for TokenBucket"""
+
+    def test_burst_then_exhausted(self, clock):
+        """A full bucket allows `rate` calls, then reports the wait for the next token"""
+        bucket = TokenBucket(10, 60.0)
+
+        assert [bucket.try_acquire() for _ in range(10)] == [0.0] * 10
+        assert bucket.try_acquire() == pytest.approx(6.0)
+
+    def test_refill(self, clock):
+        """Tokens come back at rate/period per second"""
+        bucket = TokenBucket(10, 60.0)
+        for _ in range(10):
+            bucket.try_acquire()
+
+        clock.now += 3.0
+        assert bucket.try_acquire() == pytest.approx(3.0)
+
+        clock.now += 3.0
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() > 0.0
+
+    def test_refill_capped_at_capacity(self, clock):
+        """An idle bucket never holds more than `rate` tokens"""
+        bucket = TokenBucket(3, 60.0)
+        clock.now += 3600.0
+
+        assert [bucket.try_acquire() for _ in range(3)] == [0.0] * 3
+        assert bucket.try_acquire() > 0.0
+
+
+class TestKeyedRateLimiter:
+    """Test cases for KeyedRateLimiter"""
+
+    def test_keys_are_isolated(self, clock):
+        """Exhausting one key's bucket does not affect another key"""
+        limiter = KeyedRateLimiter(2, 60.0)
+
+        assert limiter.try_acquire(1) == 0.0
+        assert limiter.try_acquire(1) == 0.0
+        assert limiter.try_acquire(1) > 0.0
+        assert limiter.try_acquire(2) == 0.0
+        assert limiter.try_acquire(2) == 0.0
+
+    def test_least_recently_used_key_evicted(self, clock):
+        """Beyond max_keys the least recently used bucket is dropped"""
+        limiter = KeyedRateLimiter(1, 60.0, max_keys=2)
+        limiter.try_acquire(1)
+        limiter.try_acquire(2)
+        limiter.try_acquire(1)
+        limiter.try_acquire(3)
+
+        assert list(limiter._buckets) == [1, 3]
+
+
+class TestAIRateLimitRoute:
+    """Per-user limit on the AI endpoints"""
+
+    class User:
+        id = 42
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(routes, "ai_user_limiter", KeyedRateLimiter(10, 60.0))
+        monkeypatch.setattr(routes, "AI_USER_RATE_PER_MINUTE", 10)
+        # The limit is enforced before the AI service is reached, so it stays offline
+        monkeypatch.setattr(routes.ai_agronomist_service, "_available", False)
+        app.dependency_overrides[get_current_user] = lambda: self.User()
+        yield TestClient(app)
+        app.dependency_overrides.pop(get_current_user, None)
+
+    def test_eleventh_call_rejected(self, client, clock):
+        """The 11th AI call within a minute gets 429 with Retry-After"""
+        payload = {"original_context": _AI_CONTEXT_EXAMPLE, "new_question": "What should I do?"}
+
+        for _ in range(10):
+            response = client.post("/api/v1/analysis/ai_chat", json=payload)
+            assert response.status_code != 429
+
+        response = client.post("/api/v1/analysis/ai_chat", json=payload)
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "6"
@@ -42,11 +42,8 @@ export interface IndexStats {
 }
 
 export interface IndicesSummary {
-  NDVI: IndexStats;
-  EVI?: IndexStats | null;
-  PSRI?: IndexStats | null;
-  NBR?: IndexStats | null;
-  NDSI?: IndexStats | null;
+  // Keyed by index name; NDVI is required (EVI, PSRI, NBR, NDSI, ... optional)
+  indices: { NDVI: IndexStats } & Record<string, IndexStats>;
 }
 
 export interface VRAZone {
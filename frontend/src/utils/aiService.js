@@ -4,6 +4,9 @@
  */
 import api from './api';
 
+// Must match AI_CHAT_MAX_HISTORY in backend/api/ai_schemas.py
+const MAX_CHAT_HISTORY = 20;
+
 /**
  * AI Service class for interacting with AI Agronomist endpoints
  */
@@ -42,7 +45,7 @@ class AIService {
     try {
       const response = await api.post('/api/v1/analysis/ai_chat', {
         original_context: originalContext,
-        chat_history: chatHistory,
+        chat_history: this._trimChatHistory(chatHistory),
         new_question: newQuestion
       }, {
         timeout: 180000 // 180 seconds (3 minutes) timeout for chat
@@ -54,6 +57,20 @@ class AIService {
     }
   }
 
+  /**
+   * Keep the chat history within the backend limit (20 messages): the first message
+   * (the generated report) plus the most recent ones
+   * 
+   * @param {Array} chatHistory - Array of previous chat messages
+   * @returns {Array} Chat history to send
+   */
+  _trimChatHistory(chatHistory) {
+    if (chatHistory.length <= MAX_CHAT_HISTORY) {
+      return chatHistory;
+    }
+    return [chatHistory[0], ...chatHistory.slice(-(MAX_CHAT_HISTORY - 1))];
+  }
+
   /**
    * Check AI service health and availability
    * 
@@ -190,11 +207,13 @@ class AIService {
         satellite: satellite
       },
       indices_summary: {
-        NDVI: {
-          mean: ndviStats.mean,
-          std_dev: ndviStats.std || ndviStats.std_dev || 0,
-          min: ndviStats.min,
-          max: ndviStats.max
+        indices: {
+          NDVI: {
+            mean: ndviStats.mean,
+            std_dev: ndviStats.std || ndviStats.std_dev || 0,
+            min: ndviStats.min,
+            max: ndviStats.max
+          }
         }
       }
     };
@@ -208,7 +227,7 @@ class AIService {
     if (additionalIndicesStats) {
       Object.keys(additionalIndicesStats).forEach(indexName => {
         if (indexName !== 'NDVI' && additionalIndicesStats[indexName]) {
-          context.indices_summary[indexName] = additionalIndicesStats[indexName];
+          context.indices_summary.indices[indexName] = additionalIndicesStats[indexName];
         }
       });
     }